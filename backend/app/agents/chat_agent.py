@@ -1,7 +1,11 @@
+import asyncio
 import logging
 import os
 import uuid
+from collections.abc import AsyncIterator
 from datetime import datetime
+from functools import lru_cache
+from typing import Any
 from uuid import UUID
 
 from langchain_openai import AzureChatOpenAI
@@ -12,6 +16,7 @@ from langgraph.graph import END, StateGraph
 from pydantic import SecretStr
 from sqlalchemy.orm import Session
 
+from ..config.langfuse import langfuse_config
 from ..models import (
     AssetConfirmation,
     AssetType,
@@ -28,44 +33,65 @@ from ..models import (
 )
 from ..models.assets import Asset, Cash, Crypto, Mortgage, RealEstate, Stock
 from .modules import (
+    ENTITY_INTENTS,
     EntityExtractor,
+    HistorySummarizer,
     IntentClassifier,
     ResponseGenerator,
+    TurnProcessor,
     WorkflowUtils,
 )
 from .services import PortfolioService
-from .session_storage import get_session_storage
+from .session_storage import get_redis_client, get_session_storage
+from .tools import get_llm_http_client, get_llm_sync_http_client
 from .utils import dump
 
 logger = logging.getLogger(__name__)
 
-langfuse = Langfuse(
-    secret_key=os.getenv("LANGFUSE_SECRET_KEY"),
-    public_key=os.getenv("LANGFUSE_PUBLIC_KEY"),
-    host=os.getenv("LANGFUSE_HOST", "https://cloud.langfuse.com")
-)
+CHAT_FALLBACK_MESSAGE = "I'm having trouble processing that. Could you try again?"
+
+langfuse = Langfuse(**langfuse_config.client_kwargs())
+
+# Per-node deployment overrides, so ops can retune models without a code change
+NODE_DEPLOYMENT_ENV = {
+    "intent": "AZURE_OPENAI_INTENT_DEPLOYMENT",
+    "entity": "AZURE_OPENAI_ENTITY_DEPLOYMENT",
+    "summary": "AZURE_OPENAI_SUMMARY_DEPLOYMENT",
+}
+
+
+langfuse_handler = CallbackHandler(**langfuse_config.client_kwargs())
+
+
+@lru_cache(maxsize=8)
+def get_chat_llm(temperature: float, deployment: str | None = None) -> AzureChatOpenAI:
+    """One client per (temperature, deployment), shared by every agent and node that asks for it."""
+    return AzureChatOpenAI(
+        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT", ""),
+        azure_deployment=deployment,
+        api_key=SecretStr(os.getenv('AZURE_OPENAI_API_KEY') or ""),
+        api_version="2025-01-01-preview",
+        temperature=temperature,
+        callbacks=[langfuse_handler],
+        http_client=get_llm_sync_http_client(),
+        http_async_client=get_llm_http_client()
+    )
 
 
 class ChatAgent:
 
     def __init__(self, db: Session | None = None):
-        self.langfuse_handler = CallbackHandler(
-            secret_key=os.getenv("LANGFUSE_SECRET_KEY"),
-            public_key=os.getenv("LANGFUSE_PUBLIC_KEY"),
-            host=os.getenv("LANGFUSE_HOST" or "")
-        )
+        self.langfuse_handler = langfuse_handler
 
-        self.llm = AzureChatOpenAI(
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT" or ""),
-            api_key=SecretStr(os.getenv('AZURE_OPENAI_API_KEY') or ""),
-            api_version="2025-01-01-preview",
-            temperature=0.3,
-            callbacks=[self.langfuse_handler]
-        )
+        self.llm = get_chat_llm(temperature=0.3)
 
-        self.intent_classifier = IntentClassifier(self.llm)
-        self.entity_extractor = EntityExtractor(self.llm)
+        # Intent and entity extraction are constrained, short-output tasks; they can run on
+        # a smaller deployment and fall back to the default one when none is configured
+        self.intent_classifier = IntentClassifier(self._node_llm("intent"), shared_cache=get_redis_client())
+        self.entity_extractor = EntityExtractor(self._node_llm("entity"))
         self.response_generator = ResponseGenerator(self.llm)
+        self.turn_processor = TurnProcessor(self.llm, self.entity_extractor)
+        self.history_summarizer = HistorySummarizer(self._node_llm("summary"))
         self.workflow_utils = WorkflowUtils()
 
         self.session_storage = get_session_storage()
@@ -78,28 +104,38 @@ class ChatAgent:
 
         logger.info("ChatAgent initialized")
 
+    def _node_llm(self, node: str) -> AzureChatOpenAI:
+        # e.g. AZURE_OPENAI_INTENT_DEPLOYMENT, then AZURE_OPENAI_SMALL_DEPLOYMENT
+        deployment = (
+            os.getenv(NODE_DEPLOYMENT_ENV[node])
+            or os.getenv("AZURE_OPENAI_SMALL_DEPLOYMENT")
+        )
+        if deployment:
+            logger.info(f"Using deployment '{deployment}' for {node} node")
+        # Temperature 0 keeps classification deterministic, which the intent cache relies on
+        return get_chat_llm(temperature=0, deployment=deployment)
+
     def _build_graph(self) -> StateGraph:
         logger.info("Building enhanced chat agent workflow graph")
         workflow = StateGraph(ChatAgentState)
 
-        workflow.add_node("classify_intent", self._classify_intent_node)
-        workflow.add_node("extract_entities", self._extract_entities_node)
+        workflow.add_node("classify_and_extract", self._classify_and_extract_node)
         workflow.add_node("prepare_confirmation", self._prepare_confirmation_node)
         workflow.add_node("update_portfolio", self._update_portfolio_node)
         workflow.add_node("generate_response", self._generate_response_node)
         workflow.add_node("prepare_form", self._prepare_form_node)
 
-        workflow.set_entry_point("classify_intent")
-        workflow.add_edge("classify_intent", "extract_entities")
+        workflow.set_entry_point("classify_and_extract")
 
         # Add conditional routing based on intent
         workflow.add_conditional_edges(
-            "extract_entities",
+            "classify_and_extract",
             self._should_prepare_confirmation,
             {
                 "prepare_confirmation": "prepare_confirmation",
                 "update_portfolio": "update_portfolio",
-                "generate_response": "generate_response"
+                "generate_response": "generate_response",
+                "end": END
             }
         )
 
@@ -124,47 +160,95 @@ class ChatAgent:
         intent = state.intent
         entities = state.entities
 
-        if intent in [Intent.ADD_ASSET, Intent.REMOVE_ASSET, Intent.MODIFY_ASSET]:
-            if entities:
-                return "prepare_confirmation"
-            else:
-                return "generate_response"
+        if intent in ENTITY_INTENTS and entities:
+            return "prepare_confirmation"
         elif intent == Intent.COMPLETE_PORTFOLIO:
             return "update_portfolio"
+        elif state.response and state.response.response:
+            # Reply already written by the fused turn call and nothing left to confirm
+            # or show, so generate_response and the form check would both be no-ops
+            return "end"
         else:
             return "generate_response"
 
-    @observe(name="classify_intent_node")
-    def _classify_intent_node(self, state: ChatAgentState) -> ChatAgentState:
-        logger.info("Classifying user intent from message")
-        result = self.intent_classifier.classify_intent(
-            session=state.session,
-            user_message=state.user_message
-        )
-        logger.info(f"Intent classified as: {result}")
+    @observe(name="classify_and_extract_node")
+    async def _classify_and_extract_node(self, state: ChatAgentState) -> dict[str, Any]:
+        # Intent and entities read the same input, so both LLM calls run concurrently;
+        # entities are discarded afterwards when the intent doesn't need them.
+        logger.info("Classifying intent and extracting entities")
+        fast_intent = self.intent_classifier.fast_intent(state.user_message)
+        if fast_intent is not None:
+            # Bare greetings and "I'm done" get a fixed reply; nothing to extract or generate
+            template = self.response_generator.template_response(fast_intent)
+            if template is not None:
+                return {"intent": fast_intent, "entities": [], "response": template}
+
+        turn = None
+        classified = None
+        if fast_intent is None and not state.stream_response:
+            # One structured call returns intent, entities and the reply together
+            turn = await self.turn_processor.aprocess_turn(
+                session=state.session,
+                user_message=state.user_message
+            )
+        elif fast_intent is None:
+            # Streamed turns still need the reply streamed token by token, so only
+            # intent and entities are fused into one call
+            classified = await self.turn_processor.aclassify_and_extract(
+                session=state.session,
+                user_message=state.user_message
+            )
+
+        if turn is not None:
+            intent, entities_list, reply = turn
+            return {
+                "intent": intent,
+                "entities": entities_list,
+                "response": ResponseGenerationResponse(response=reply)
+            }
+
+        if classified is not None:
+            intent, entities_list = classified
+        elif fast_intent is not None:
+            # Intent known up front: only extract when it actually needs entities
+            intent = fast_intent
+            entities_list = await self.entity_extractor.aextract_entities(
+                session=state.session,
+                user_message=state.user_message,
+                intent=intent
+            )
+        else:
+            intent, entities_list = await asyncio.gather(
+                self.intent_classifier.aclassify_intent(
+                    session=state.session,
+                    user_message=state.user_message
+                ),
+                self.entity_extractor.aextract_entities(
+                    session=state.session,
+                    user_message=state.user_message
+                )
+            )
+        logger.info(f"Intent classified as: {intent}")
+
+        if intent not in ENTITY_INTENTS:
+            entities_list = []
+        logger.info(f"Entities extracted: {len(entities_list)} entities")
 
         try:
             langfuse_context.update_current_observation(
-                metadata={"intent": result}
+                metadata={
+                    "intent": intent,
+                    "entity_count": len(entities_list),
+                    "fast_path": fast_intent is not None
+                }
             )
         except Exception as e:
             logger.error(f"Failed to update Langfuse metadata: {e}")
 
-        return state.model_copy(update={"intent": result})
-
-    @observe(name="extract_entities_node")
-    def _extract_entities_node(self, state: ChatAgentState) -> ChatAgentState:
-        logger.info(f"Extracting entities for intent: {state.intent}")
-        entities_list = self.entity_extractor.extract_entities(
-            session=state.session,
-            user_message=state.user_message,
-            intent=state.intent or Intent.UNCLEAR
-        )
-        logger.info(f"Entities extracted: {len(entities_list)} entities")
-        return state.model_copy(update={"entities": entities_list})
+        return {"intent": intent, "entities": entities_list}
 
     @observe(name="prepare_confirmation_node")
-    def _prepare_confirmation_node(self, state: ChatAgentState) -> ChatAgentState:
+    def _prepare_confirmation_node(self, state: ChatAgentState) -> dict[str, Any]:
         logger.info("Preparing portfolio action confirmation")
 
         intent = state.intent
@@ -172,9 +256,11 @@ class ChatAgent:
         session = state.session
 
         if not entities_list:
-            return state.model_copy(update={
-                "response": "I couldn't understand the asset details. Could you please clarify?"
-            })
+            return {
+                "response": ResponseGenerationResponse(
+                    response="I couldn't understand the asset details. Could you please clarify?"
+                )
+            }
 
         confirmation_id = f"conf_{uuid.uuid4().hex[:8]}"
 
@@ -186,9 +272,11 @@ class ChatAgent:
                 asset_confirmations.append(asset_conf)
 
         if not asset_confirmations:
-            return state.model_copy(update={
-                "response": "I couldn't understand the asset details. Could you please clarify?"
-            })
+            return {
+                "response": ResponseGenerationResponse(
+                    response="I couldn't understand the asset details. Could you please clarify?"
+                )
+            }
 
         action_map = {
             Intent.ADD_ASSET: PortfolioAction.ADD_ASSET,
@@ -224,13 +312,13 @@ class ChatAgent:
             "show_portfolio_summary": True
         })
 
-        return state.model_copy(update={
+        return {
             "confirmation_request": confirmation_request,
             "ui_hints": updated_ui_hints
-        })
+        }
 
     @observe(name="update_portfolio_node")
-    def _update_portfolio_node(self, state: ChatAgentState) -> ChatAgentState:
+    def _update_portfolio_node(self, state: ChatAgentState) -> dict[str, Any]:
         logger.info(f"Processing portfolio completion intent: {state.intent}")
         
         # For COMPLETE_PORTFOLIO intent, just update UI hints
@@ -240,19 +328,25 @@ class ChatAgent:
         })
 
         logger.info("Portfolio completion UI hints updated")
-        return state.model_copy(update={"ui_hints": updated_ui_hints})
+        return {"ui_hints": updated_ui_hints}
 
     @observe(name="generate_response_node")
-    def _generate_response_node(self, state: ChatAgentState) -> ChatAgentState:
+    async def _generate_response_node(self, state: ChatAgentState) -> dict[str, Any]:
         logger.info("Generating response to user")
 
         if hasattr(state, 'confirmation_request') and state.confirmation_request:
-            return state.model_copy(update={
+            return {
                 "response": ResponseGenerationResponse(response="Please confirm this change."),
                 "ui_hints": state.ui_hints or UIHints()
-            })
+            }
+        elif state.stream_response:
+            # process_message_stream generates the text itself, token by token
+            return {}
+        elif state.response and state.response.response:
+            # Already written by the fused turn call
+            return {}
         else:
-            result = self.response_generator.generate_response(
+            result = await self.response_generator.agenerate_response(
                 session=state.session,
                 user_message=state.user_message,
                 intent=state.intent or Intent.UNCLEAR,
@@ -261,17 +355,17 @@ class ChatAgent:
 
             logger.info(f"Response generated ({len(result.response)} characters)")
 
-            return state.model_copy(update={
+            return {
                 "response": result
-            })
+            }
 
     @observe(name="prepare_form_node")
-    def _prepare_form_node(self, state: ChatAgentState) -> ChatAgentState:
+    def _prepare_form_node(self, state: ChatAgentState) -> dict[str, Any]:
         logger.info("Portfolio form generation no longer needed - using direct confirmation flow")
-        return state.model_copy(update={
+        return {
             "show_form": False,
             "response": ResponseGenerationResponse(response="Portfolio action completed")
-        })
+        }
 
     def _build_asset_confirmation(self, entities: dict, intent: Intent) -> AssetConfirmation | None:
         try:
@@ -376,7 +470,7 @@ class ChatAgent:
             return f"Would you like to proceed with changes to {asset_list}?"
 
     @observe(name="process_message")
-    def process_message(
+    async def process_message(
         self,
         session_id: str,
         user_message: str,
@@ -385,7 +479,125 @@ class ChatAgent:
     ) -> dict:
         logger.info(f"Processing message for session {session_id}: '{user_message[:5]}{'...' if len(user_message) > 5 else ''}'")
 
-        trace = langfuse.trace(
+        trace = self._start_trace(session_id, user_message, user_id)
+        session = self._load_session(session_id, user_id, user_message)
+        summary_task = self._start_summary(session)
+        initial_state = self._initial_state(session, user_message)
+
+        try:
+            langfuse_context.update_current_observation(
+                metadata={
+                    "session_id": session_id,
+                    "user_id": user_id,
+                    "processing_step": "graph_invocation",
+                    "trace_id": trace.id
+                }
+            )
+
+            logger.info("Invoking chat workflow graph")
+            raw_result = await self.graph.ainvoke(initial_state)  # type: ignore
+            result = ChatAgentState.model_validate(raw_result)
+
+            message_text = result.response.response if result.response else "I'm not sure how to respond to that."
+            await self._apply_summary(session, summary_task)
+            return self._finish_turn(session, result, message_text, trace)
+
+        except Exception as e:
+            logger.error(f"Chat processing failed for session {session_id}: {e}", exc_info=True)
+
+            self._fail_turn(session, trace, e)
+
+            return {
+                "message": CHAT_FALLBACK_MESSAGE,
+                "session_id": session_id,
+                "error": str(e)
+            }
+
+        finally:
+            self._cancel_summary(summary_task)
+
+    @observe(name="process_message_stream")
+    async def process_message_stream(
+        self,
+        session_id: str,
+        user_message: str,
+        user_id: str | None = None
+    ) -> AsyncIterator[dict]:
+        """Run the workflow, then yield a metadata event followed by response tokens as they are generated."""
+        logger.info(f"Streaming message for session {session_id}")
+
+        trace = self._start_trace(session_id, user_message, user_id)
+        session = self._load_session(session_id, user_id, user_message)
+        summary_task = self._start_summary(session)
+        initial_state = self._initial_state(session, user_message).model_copy(update={
+            "response": None,
+            "stream_response": True
+        })
+
+        metadata_sent = False
+        chunks: list[str] = []
+        try:
+            raw_result = await self.graph.ainvoke(initial_state)  # type: ignore
+            result = ChatAgentState.model_validate(raw_result)
+
+            yield {"type": "metadata", **self._response_fields(session_id, result)}
+            metadata_sent = True
+
+            if result.response:
+                chunks.append(result.response.response)
+                yield {"type": "token", "content": result.response.response}
+            else:
+                async for chunk in self.response_generator.astream_response(
+                    session=session,
+                    user_message=user_message,
+                    intent=result.intent or Intent.UNCLEAR,
+                    entities=result.entities
+                ):
+                    chunks.append(chunk)
+                    yield {"type": "token", "content": chunk}
+
+            # Persist only once the full response exists
+            await self._apply_summary(session, summary_task)
+            self._finish_turn(session, result, "".join(chunks), trace)
+
+        except Exception as e:
+            logger.error(f"Chat streaming failed for session {session_id}: {e}", exc_info=True)
+            self._fail_turn(session, trace, e, "".join(chunks))
+
+            if not metadata_sent:
+                yield {"type": "metadata", "session_id": session_id, "errors": [str(e)]}
+            if not chunks:
+                yield {"type": "token", "content": CHAT_FALLBACK_MESSAGE}
+
+        finally:
+            # Also reached when the graph raises or the client disconnects mid-stream
+            self._cancel_summary(summary_task)
+
+    def _start_summary(self, session: ChatSession) -> asyncio.Task | None:
+        # Runs alongside the graph, which still reads the previous summary
+        if not self.history_summarizer.needs_summary(session):
+            return None
+        return asyncio.create_task(self.history_summarizer.asummarize(session))
+
+    async def _apply_summary(self, session: ChatSession, summary_task: asyncio.Task | None):
+        # Applied before the assistant reply is added, so the covered count still lines up
+        if summary_task is None:
+            return
+        try:
+            result = await summary_task
+        except Exception as e:
+            logger.error(f"History summary task failed: {e}")
+            return
+        if result:
+            session.history_summary, session.summarized_messages = result
+
+    def _cancel_summary(self, summary_task: asyncio.Task | None):
+        # A no-op once _apply_summary has awaited it; otherwise the turn failed and the result is unused
+        if summary_task is not None and not summary_task.done():
+            summary_task.cancel()
+
+    def _start_trace(self, session_id: str, user_message: str, user_id: str | None):
+        return langfuse.trace(
             name="chat_conversation",
             session_id=session_id,
             user_id=user_id,
@@ -397,6 +609,7 @@ class ChatAgent:
             input={"user_message": user_message}
         )
 
+    def _load_session(self, session_id: str, user_id: str | None, user_message: str) -> ChatSession:
         session = self.session_storage.get(session_id)
         if not session:
             logger.info(f"Creating new chat session: {session_id}")
@@ -408,8 +621,10 @@ class ChatAgent:
             logger.info(f"Resuming existing session: {session_id} (messages: {len(session.messages)})")
 
         session.add_message("user", user_message)
+        return session
 
-        initial_state = ChatAgentState(
+    def _initial_state(self, session: ChatSession, user_message: str) -> ChatAgentState:
+        return ChatAgentState(
             session=session,
             user_message=user_message,
             current_step="start",
@@ -423,85 +638,73 @@ class ChatAgent:
             errors=[]
         )
 
-        try:
-            langfuse_context.update_current_observation(
-                metadata={
-                    "session_id": session_id,
-                    "user_id": user_id,
-                    "processing_step": "graph_invocation",
-                    "trace_id": trace.id
+    def _response_fields(self, session_id: str, result: ChatAgentState) -> dict:
+        # has to be json serializable for sse
+        return {
+            "session_id": session_id,
+            "ui_hints": dump(result.ui_hints),
+            "show_form": result.show_form,
+            **(
+                {
+                    "confirmation_request": dump(result.confirmation_request),
+                    "requires_confirmation": getattr(result.confirmation_request, "confirmed", None) is None,
                 }
-            )
-
-            logger.info("Invoking chat workflow graph")
-            raw_result = self.graph.invoke(initial_state)  # type: ignore
-            result = ChatAgentState.model_validate(raw_result)
+                if result.confirmation_request
+                else {}
+            ),
+            **({"errors": list(result.errors)} if result.errors else {}),
+        }
 
-            message_text = result.response.response if result.response else "I'm not sure how to respond to that."
+    def _fail_turn(self, session: ChatSession, trace, error: Exception, partial_text: str = ""):
+        """Record a failed turn, keeping the user message and whatever reply the user actually saw."""
+        trace.update(
+            output={"error": str(error)},
+            metadata={"success": False, "error": str(error)}
+        )
+        # _finish_turn may already have added the reply before failing to store it
+        if session.messages and session.messages[-1].role == "user":
+            session.add_message("assistant", partial_text or CHAT_FALLBACK_MESSAGE, {"error": str(error)})
+        try:
+            self.session_storage.append_messages(session.session_id, session, session.messages[-2:])
+        except Exception as e:
+            logger.error(f"Failed to persist failed turn for session {session.session_id}: {e}")
+
+    def _finish_turn(self, session: ChatSession, result: ChatAgentState, message_text: str, trace) -> dict:
+        response_metadata = { #json safe
+            "ui_hints": dump(result.ui_hints),
+            "show_form": result.show_form,
+            **(
+                {"confirmation_request": dump(result.confirmation_request)}
+                if result.confirmation_request
+                else {}
+            ),
+        }
 
-            response_metadata = { #json safe
-                "ui_hints": dump(result.ui_hints),
-                "show_form": result.show_form,
-                **(
-                    {"confirmation_request": dump(result.confirmation_request)}
-                    if result.confirmation_request
-                    else {}
-                ),
-            }
+        session.add_message("assistant", message_text, response_metadata)
+        # The turn's user and assistant messages are the only new ones
+        self.session_storage.append_messages(session.session_id, session, session.messages[-2:])
 
-            session.add_message("assistant", message_text, response_metadata)
-            self.session_storage.set(session_id, session)
+        response = {"message": message_text, **self._response_fields(session.session_id, result)}
 
-            # has to be json serializable for sse
-            response = {
-                "message": message_text,
-                "session_id": session_id,
-                "ui_hints": dump(result.ui_hints),
+        trace.update(
+            output=response,
+            metadata={
+                "success": True,
                 "show_form": result.show_form,
-                **(
-                    {
-                        "confirmation_request": dump(result.confirmation_request),
-                        "requires_confirmation": getattr(result.confirmation_request, "confirmed", None) is None,
-                    }
-                    if result.confirmation_request
-                    else {}
+                "intent": dump(result.intent),
+                "entities_extracted": bool(result.entities),
+                "confirmation_pending": bool(
+                    result.confirmation_request
+                    and getattr(result.confirmation_request, "confirmed", None) is None
                 ),
-                **({"errors": list(result.errors)} if result.errors else {}),
-            }
-
-            trace.update(
-                output=response,
-                metadata={
-                    "success": True,
-                    "show_form": result.show_form,
-                    "intent": dump(result.intent),
-                    "entities_extracted": bool(result.entities),
-                    "confirmation_pending": bool(
-                        result.confirmation_request
-                        and getattr(result.confirmation_request, "confirmed", None) is None
-                    ),
-                },
-            )
-
-            logger.info(
-                "Message processed - Confirmation: %s",
-                bool(result.confirmation_request),
-            )
-            return response
-
-        except Exception as e:
-            logger.error(f"Chat processing failed for session {session_id}: {e}", exc_info=True)
-
-            trace.update(
-                output={"error": str(e)},
-                metadata={"success": False, "error": str(e)}
-            )
+            },
+        )
 
-            return {
-                "message": "I'm having trouble processing that. Could you try again?",
-                "session_id": session_id,
-                "error": str(e)
-            }
+        logger.info(
+            "Message processed - Confirmation: %s",
+            bool(result.confirmation_request),
+        )
+        return response
 
     @observe(name="process_confirmation")
     def process_confirmation(
@@ -1,11 +1,17 @@
-from .entity_extractor import EntityExtractor
+from .entity_extractor import ENTITY_INTENTS, EntityExtractor
+from .history_summarizer import HistorySummarizer, conversation_history
 from .intent_classifier import IntentClassifier
 from .response_generator import ResponseGenerator
+from .turn_processor import TurnProcessor
 from .workflow_utils import WorkflowUtils
 
 __all__ = [
+    "ENTITY_INTENTS",
     "EntityExtractor",
+    "HistorySummarizer",
     "IntentClassifier", 
     "ResponseGenerator",
+    "TurnProcessor",
     "WorkflowUtils",
+    "conversation_history",
 ]
@@ -1,91 +1,142 @@
 import logging
 import re
 
-from langchain.schema import AIMessage, BaseMessage, HumanMessage
+from langchain.schema import BaseMessage
 from langchain_openai import AzureChatOpenAI
 from langfuse.decorators import langfuse_context, observe
 from pydantic import ValidationError
 
 from ...config.prompts import prompt_manager
 from ...models import ChatSession, EntityData, EntityExtractionResponse, Intent
+from .history_summarizer import conversation_history
 
 logger = logging.getLogger(__name__)
 
+ENTITY_INTENTS = frozenset({Intent.ADD_ASSET, Intent.MODIFY_ASSET, Intent.REMOVE_ASSET})
+
+NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+COREFERENCE_RE = re.compile(r"\b(same|it|that|those|this)\b", re.IGNORECASE)
+
 
 class EntityExtractor:
     def __init__(self, llm: AzureChatOpenAI):
         self.llm = llm
+        # Strict JSON-schema decoding: the model can only emit a valid EntityExtractionResponse.
+        # Built once rather than per call.
+        self.structured_llm = llm.with_structured_output(
+            EntityExtractionResponse,
+            method="json_schema",
+            strict=True
+        )
 
     @observe(name="extract_entities_tool")
     def extract_entities(self, session: ChatSession, user_message: str, intent: Intent) -> list[EntityData]:
-        if intent not in [Intent.ADD_ASSET, Intent.MODIFY_ASSET, Intent.REMOVE_ASSET]:
+        if intent not in ENTITY_INTENTS:
             return []
 
-        conversation_history: list[BaseMessage] = []
-        for msg in session.messages[-6:]:
-            conversation_history.append(
-                HumanMessage(content=msg.content) if msg.role == "user"
-                else AIMessage(content=msg.content)
-            )
+        messages = self._build_messages(session, user_message)
+
+        try:
+            raw_response = self.structured_llm.invoke(messages, timeout=8)
+            return self._process_response(raw_response, session, user_message, intent)
+
+        except Exception as e:
+            logger.error(f"Entity extraction failed: {e}", exc_info=True)
+            self._observe(session, user_message, intent, {"error": str(e)})
+            return []
 
-        messages = prompt_manager.build_messages(
+    @observe(name="aextract_entities_tool")
+    async def aextract_entities(
+        self,
+        session: ChatSession,
+        user_message: str,
+        intent: Intent | None = None
+    ) -> list[EntityData]:
+        # intent=None runs extraction speculatively; the caller gates on the intent afterwards
+        if intent is not None and intent not in ENTITY_INTENTS:
+            return []
+
+        messages = self._build_messages(session, user_message)
+
+        try:
+            raw_response = await self.structured_llm.ainvoke(messages, timeout=8)
+            return self._process_response(raw_response, session, user_message, intent)
+
+        except Exception as e:
+            logger.error(f"Entity extraction failed: {e}", exc_info=True)
+            self._observe(session, user_message, intent, {"error": str(e)})
+            return []
+
+    def _build_messages(self, session: ChatSession, user_message: str) -> list[BaseMessage]:
+        history = conversation_history(session, limit=6)
+
+        return prompt_manager.build_messages(
             system_prompt_name="chat-entity-extractor",
             user_content=user_message,
-            conversation_history=conversation_history
+            conversation_history=history
         )
 
-        def _observe(extra: dict):
-            langfuse_context.update_current_observation(
-                metadata={
-                    "session_id": session.session_id,
-                    "message_count": len(session.messages),
-                    "user_message": user_message,
-                    "intent": intent,
-                    **extra
-                }
+    def _process_response(
+        self,
+        raw_response,
+        session: ChatSession,
+        user_message: str,
+        intent: Intent | None
+    ) -> list[EntityData]:
+        try:
+            entity_response = EntityExtractionResponse.model_validate(raw_response)
+            resolved_entities = self.resolve_entities(
+                entity_response.primary_entity, entity_response.entities, session
             )
 
-        try:
-            raw_response = self.llm.with_structured_output(EntityExtractionResponse).invoke(messages, timeout=8)
-            try:
-                entity_response = EntityExtractionResponse.model_validate(raw_response)
-                entity_data = entity_response.primary_entity or (entity_response.entities[0] if entity_response.entities else None)
-
-                # Process all entities and resolve references
-                resolved_entities = []
-
-                if entity_data:  # Primary entity
-                    resolved_entity = self.resolve_references(entity_data, session)
-                    resolved_entities.append(resolved_entity)
-
-                # Process additional entities from the list
-                for additional_entity in entity_response.entities:
-                    if additional_entity != entity_data:  # Avoid duplicating primary entity
-                        resolved_entity = self.resolve_references(additional_entity, session)
-                        resolved_entities.append(resolved_entity)
-
-                if resolved_entities:
-                    logger.info(f"Successfully extracted and resolved {len(resolved_entities)} entities")
-                    _observe({
-                        "entities_extracted": True,
-                        "entity_count": len(resolved_entities),
-                        "entities": [e.model_dump(exclude_none=True) for e in resolved_entities]
-                    })
-                    return resolved_entities
-                else:
-                    logger.warning("No entities extracted from response")
-                    _observe({"entities_extracted": False})
-                    return []
-            except ValidationError as ve:
-                logger.error(f"Entity validation error: {ve}", exc_info=True)
-                _observe({"validation_error": str(ve)})
+            if resolved_entities:
+                logger.info(f"Successfully extracted and resolved {len(resolved_entities)} entities")
+                self._observe(session, user_message, intent, {
+                    "entities_extracted": True,
+                    "entity_count": len(resolved_entities),
+                    "entities": [e.model_dump(exclude_none=True) for e in resolved_entities]
+                })
+                return resolved_entities
+            else:
+                logger.warning("No entities extracted from response")
+                self._observe(session, user_message, intent, {"entities_extracted": False})
                 return []
-
-        except Exception as e:
-            logger.error(f"Entity extraction failed: {e}", exc_info=True)
-            _observe({"error": str(e)})
+        except ValidationError as ve:
+            logger.error(f"Entity validation error: {ve}", exc_info=True)
+            self._observe(session, user_message, intent, {"validation_error": str(ve)})
             return []
 
+    def resolve_entities(
+        self,
+        primary_entity: EntityData | None,
+        entities: list[EntityData],
+        session: ChatSession
+    ) -> list[EntityData]:
+        entity_data = primary_entity or (entities[0] if entities else None)
+
+        # Process all entities and resolve references
+        resolved_entities = []
+
+        if entity_data:  # Primary entity
+            resolved_entities.append(self.resolve_references(entity_data, session))
+
+        # Process additional entities from the list
+        for additional_entity in entities:
+            if additional_entity != entity_data:  # Avoid duplicating primary entity
+                resolved_entities.append(self.resolve_references(additional_entity, session))
+
+        return resolved_entities
+
+    def _observe(self, session: ChatSession, user_message: str, intent: Intent | None, extra: dict):
+        langfuse_context.update_current_observation(
+            metadata={
+                "session_id": session.session_id,
+                "message_count": len(session.messages),
+                "user_message": user_message,
+                "intent": intent,
+                **extra
+            }
+        )
 
     @observe(name="resolve_references")
     def resolve_references(self, entity_data: EntityData, session: ChatSession) -> EntityData:
@@ -94,20 +145,28 @@ class EntityExtractor:
         if current_asset_type and not entity_data.asset_type:
             entity_data.asset_type = current_asset_type
 
-        # Extract recent numerical values from conversation history for reference resolution
-        if session.messages:
-            recent_amounts = []
-            for msg in session.messages[-4:]:
+        # Only scan history when a quantity is missing and the latest message refers back to it
+        if (
+            session.messages
+            and not entity_data.amount
+            and not entity_data.shares
+            and COREFERENCE_RE.search(session.messages[-1].content)
+        ):
+            # Newest user message first; only the last number mentioned is needed
+            last_amount = None
+            for msg in reversed(session.messages[-4:]):
                 if msg.role == "assistant":
                     continue
-                numbers = re.findall(r'\b\d+(?:\.\d+)?\b', msg.content)
-                recent_amounts.extend(numbers)
+                numbers = NUMBER_RE.findall(msg.content)
+                if numbers:
+                    last_amount = numbers[-1]
+                    break
 
             # Resolve missing amount/shares from recent conversation
-            if not entity_data.amount and not entity_data.shares and recent_amounts:
+            if last_amount is not None:
                 if entity_data.asset_type == "stock":
-                    entity_data.shares = int(float(recent_amounts[-1]))
+                    entity_data.shares = int(float(last_amount))
                 else:
-                    entity_data.amount = float(recent_amounts[-1])
+                    entity_data.amount = float(last_amount)
 
         return entity_data
@@ -0,0 +1,97 @@
+import logging
+
+from langchain.schema import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_openai import AzureChatOpenAI
+from langfuse.decorators import langfuse_context, observe
+
+from ...config.prompts import prompt_manager
+from ...models import ChatSession
+
+logger = logging.getLogger(__name__)
+
+# Fold older messages into the summary once more than 8 have piled up
+SUMMARY_TRIGGER_MESSAGES = 9
+# Most recent messages always sent verbatim: the last two full user/assistant exchanges
+RAW_TAIL_MESSAGES = 4
+
+
+# Largest window any module asks for; the converted window is shared between them
+HISTORY_WINDOW_MESSAGES = 10
+
+
+def conversation_history(session: ChatSession, limit: int) -> list[BaseMessage]:
+    """Rolling summary of older turns (if any) followed by the last `limit` unsummarized messages."""
+    window = _history_window(session, max(limit, HISTORY_WINDOW_MESSAGES))
+    summary, messages = window
+    history: list[BaseMessage] = [summary] if summary else []
+    history.extend(messages[-limit:])
+    return history
+
+
+def _history_window(session: ChatSession, size: int) -> tuple[SystemMessage | None, list[BaseMessage]]:
+    # Every node of a turn reads the same window, so the LangChain messages are built once
+    # and reused until a message is added or the summary moves
+    key = (
+        len(session.messages),
+        id(session.messages[-1]) if session.messages else None,
+        session.summarized_messages,
+        session.history_summary,
+        size,
+    )
+    cached = session._history_cache
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    summary = (
+        SystemMessage(content=f"Prior conversation summary: {session.history_summary}")
+        if session.history_summary else None
+    )
+    # One slice of at most `size` messages, never a copy of the whole unsummarized tail
+    start = max(session.summarized_messages, len(session.messages) - size)
+    messages: list[BaseMessage] = [
+        HumanMessage(content=msg.content) if msg.role == "user" else AIMessage(content=msg.content)
+        for msg in session.messages[start:]
+    ]
+    session._history_cache = (key, (summary, messages))
+    return summary, messages
+
+
+class HistorySummarizer:
+    def __init__(self, llm: AzureChatOpenAI):
+        self.llm = llm
+
+    def needs_summary(self, session: ChatSession) -> bool:
+        return len(session.messages) - session.summarized_messages >= SUMMARY_TRIGGER_MESSAGES
+
+    @observe(name="summarize_history_tool")
+    async def asummarize(self, session: ChatSession) -> tuple[str, int] | None:
+        """Return the new summary and how many leading messages it covers, or None on failure."""
+        covered = len(session.messages) - RAW_TAIL_MESSAGES
+        transcript = "\n".join(
+            f"{msg.role}: {msg.content}" for msg in session.messages[session.summarized_messages:covered]
+        )
+        if session.history_summary:
+            transcript = f"Existing summary: {session.history_summary}\n\n{transcript}"
+
+        messages = prompt_manager.build_messages(
+            system_prompt_name="chat-history-summarizer",
+            user_content=transcript
+        )
+
+        try:
+            result = await self.llm.ainvoke(messages, max_tokens=200, timeout=10)
+        except Exception as e:
+            # Callers keep the previous summary and simply send more raw history
+            logger.error(f"History summarization failed: {e}", exc_info=True)
+            langfuse_context.update_current_observation(metadata={"error": str(e)})
+            return None
+
+        summary = str(result.content).strip()
+        langfuse_context.update_current_observation(
+            metadata={
+                "session_id": session.session_id,
+                "summarized_messages": covered,
+                "summary_length": len(summary)
+            }
+        )
+        return summary, covered
@@ -1,60 +1,231 @@
+import asyncio
+import hashlib
 import logging
+import re
+import time
 
-from langchain.schema import AIMessage, BaseMessage, HumanMessage
+import redis
+from langchain.schema import BaseMessage
 from langchain_openai import AzureChatOpenAI
 from langfuse.decorators import langfuse_context, observe
 from pydantic import ValidationError
 
 from ...config.prompts import prompt_manager
 from ...models import ChatSession, Intent, IntentClassificationResponse
+from .history_summarizer import conversation_history
 
 logger = logging.getLogger(__name__)
 
+INTENT_CACHE_TTL_SECONDS = 3600
+INTENT_CACHE_MAX_ENTRIES = 2048
+INTENT_CACHE_KEY_PREFIX = "intent_cache:"
+
+# A quantity of one upper-case ticker or major coin, and nothing else: "100 shares of AAPL", "0.5 BTC"
+_TICKER = r"((?-i:[A-Z]{1,5})|btc|eth|bitcoin|ethereum)"
+_ASSET_PHRASE = rf"\$?\d+(\.\d+)?\s*(shares?\s+(of\s+)?)?{_TICKER}(\s+shares?)?"
+
+# Unambiguous phrasings resolved without an LLM call; checked in order, anything
+# else falls through to the model. Every pattern is anchored at both ends so a
+# second clause ("..., should I sell?") always reaches the model
+FAST_INTENT_PATTERNS: list[tuple[re.Pattern[str], Intent]] = [
+    (re.compile(r"^\s*(hi|hello|hey)\b[\s!.,]*$", re.IGNORECASE), Intent.START),
+    (
+        re.compile(r"^\s*(i'?m\s+)?(done|finished|complete|that.?s\s+(all|it))[\s!.]*$", re.IGNORECASE),
+        Intent.COMPLETE_PORTFOLIO,
+    ),
+    (
+        re.compile(
+            r"^\s*(list|show(\s+me)?|what.?s\s+in)\s+(my\s+)?(portfolio|assets?|holdings?)[\s?!.]*$",
+            re.IGNORECASE,
+        ),
+        Intent.VIEW_PORTFOLIO,
+    ),
+    (
+        re.compile(
+            rf"^\s*(remove|delete|drop)\s+(my\s+|all\s+(of\s+)?(my\s+)?)?"
+            rf"({_ASSET_PHRASE}|{_TICKER}(\s+shares?|\s+position)?)"
+            r"(\s+from\s+my\s+portfolio)?[\s!.]*$",
+            re.IGNORECASE,
+        ),
+        Intent.REMOVE_ASSET,
+    ),
+    (
+        re.compile(rf"^\s*(add|buy|bought|i\s+own|i\s+have)\s+{_ASSET_PHRASE}[\s!.]*$", re.IGNORECASE),
+        Intent.ADD_ASSET,
+    ),
+]
+
 
 class IntentClassifier:
-    def __init__(self, llm: AzureChatOpenAI):
+    def __init__(self, llm: AzureChatOpenAI, shared_cache: redis.Redis | None = None):
         self.llm = llm
+        # Optional Redis L2 behind the in-process cache, shared by every worker
+        self.shared_cache = shared_cache
+        # Built once; the parsed IntentClassificationResponse needs no content coercion
+        self.structured_llm = llm.with_structured_output(IntentClassificationResponse)
+        self._cache: dict[str, tuple[Intent, float]] = {}
+
+    def fast_intent(self, user_message: str) -> Intent | None:
+        for pattern, intent in FAST_INTENT_PATTERNS:
+            if pattern.search(user_message):
+                logger.info(f"Intent resolved without LLM: {intent}")
+                return intent
+        return None
 
     @observe(name="classify_intent_tool")
     def classify_intent(self, session: ChatSession, user_message: str) -> Intent:
-        conversation_history: list[BaseMessage] = []
-        for msg in session.messages[-10:]:
-            conversation_history.append(
-                HumanMessage(content=msg.content) if msg.role == "user"
-                else AIMessage(content=msg.content)
-            )
+        fast = self.fast_intent(user_message)
+        if fast is not None:
+            self._observe(session, user_message, {"intent": fast.value, "fast_path": True})
+            return fast
 
-        messages = prompt_manager.build_messages(
-            system_prompt_name="chat-intent-classifier",
-            user_content=user_message,
-            conversation_history=conversation_history
-        )
-
-        def _observe(extra: dict):
-            langfuse_context.update_current_observation(
-                metadata={
-                    "session_id": session.session_id,
-                    "message_count": len(session.messages),
-                    "user_message": user_message,
-                    **extra
-                    }
-                )
+        messages = self._build_messages(session, user_message)
+        cache_key = self._cache_key(messages)
+        cached = self._get_cached_intent(cache_key)
+        if cached is not None:
+            self._observe(session, user_message, {"intent": cached.value, "cache_hit": True})
+            return cached
 
         try:
-            raw_response = self.llm.with_structured_output(IntentClassificationResponse).invoke(messages, timeout=8)
-            try:
-                intent_response = IntentClassificationResponse.model_validate(raw_response)
-                intent = intent_response.intent
-            except ValidationError as ve:
-                logger.error(f"Intent validation error: {ve}", exc_info=True)
-                _observe({"validation_error": str(ve)})
-                intent = Intent.UNCLEAR
+            raw_response = self.structured_llm.invoke(messages, timeout=8)
+            intent = self._parse_intent(raw_response, session, user_message)
+            self._put_cached_intent(cache_key, intent)
+            return intent
 
-            _observe({"intent": intent.value})
+        except Exception as e:
+            logger.error(f"Intent classification failed: {e}", exc_info=True)
+            self._observe(session, user_message, {"error": str(e)})
+            return Intent.UNCLEAR
+
+    @observe(name="aclassify_intent_tool")
+    async def aclassify_intent(self, session: ChatSession, user_message: str) -> Intent:
+        fast = self.fast_intent(user_message)
+        if fast is not None:
+            self._observe(session, user_message, {"intent": fast.value, "fast_path": True})
+            return fast
 
+        messages = self._build_messages(session, user_message)
+        cache_key = self._cache_key(messages)
+        cached = await self._aget_cached_intent(cache_key)
+        if cached is not None:
+            self._observe(session, user_message, {"intent": cached.value, "cache_hit": True})
+            return cached
+
+        try:
+            raw_response = await self.structured_llm.ainvoke(messages, timeout=8)
+            intent = self._parse_intent(raw_response, session, user_message)
+            await self._aput_cached_intent(cache_key, intent)
             return intent
 
         except Exception as e:
             logger.error(f"Intent classification failed: {e}", exc_info=True)
-            _observe({"error": str(e)})
+            self._observe(session, user_message, {"error": str(e)})
             return Intent.UNCLEAR
+
+    def _build_messages(self, session: ChatSession, user_message: str) -> list[BaseMessage]:
+        history = conversation_history(session, limit=10)
+
+        return prompt_manager.build_messages(
+            system_prompt_name="chat-intent-classifier",
+            user_content=user_message,
+            conversation_history=history
+        )
+
+    def _cache_key(self, messages: list[BaseMessage]) -> str:
+        # Keyed on the normalized message plus the last assistant reply, which is what a short
+        # answer like "yes" or "the second one" depends on; older history is left out so common
+        # messages hit across conversations. The system prompt is included so a prompt edit in
+        # Langfuse invalidates old entries
+        last_reply = next((str(m.content) for m in reversed(messages) if m.type == "ai"), "")
+        user_message = " ".join(str(messages[-1].content).lower().split())
+        payload = "\x1e".join((str(messages[0].content), last_reply, user_message))
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+    def _get_cached_intent(self, key: str) -> Intent | None:
+        local = self._get_local(key)
+        if local is not None or self.shared_cache is None:
+            return local
+        shared = self._get_shared(key)
+        if shared is not None:
+            self._put_local(key, shared)
+        return shared
+
+    async def _aget_cached_intent(self, key: str) -> Intent | None:
+        local = self._get_local(key)
+        if local is not None or self.shared_cache is None:
+            return local
+        # redis-py is blocking, so the L2 round trip runs off the event loop
+        shared = await asyncio.to_thread(self._get_shared, key)
+        if shared is not None:
+            self._put_local(key, shared)
+        return shared
+
+    def _put_cached_intent(self, key: str, intent: Intent):
+        # UNCLEAR is also what failures degrade to, so it is never worth pinning
+        if intent == Intent.UNCLEAR:
+            return
+        self._put_local(key, intent)
+        if self.shared_cache is not None:
+            self._put_shared(key, intent)
+
+    async def _aput_cached_intent(self, key: str, intent: Intent):
+        if intent == Intent.UNCLEAR:
+            return
+        self._put_local(key, intent)
+        if self.shared_cache is not None:
+            await asyncio.to_thread(self._put_shared, key, intent)
+
+    def _get_local(self, key: str) -> Intent | None:
+        entry = self._cache.get(key)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+        return None
+
+    def _get_shared(self, key: str) -> Intent | None:
+        try:
+            value = self.shared_cache.get(f"{INTENT_CACHE_KEY_PREFIX}{key}")  # type: ignore[union-attr]
+            if value is None:
+                return None
+            return Intent(value)
+        except Exception as e:
+            logger.warning(f"Shared intent cache lookup failed: {e}")
+            return None
+
+    def _put_shared(self, key: str, intent: Intent):
+        try:
+            self.shared_cache.setex(  # type: ignore[union-attr]
+                f"{INTENT_CACHE_KEY_PREFIX}{key}", INTENT_CACHE_TTL_SECONDS, intent.value
+            )
+        except Exception as e:
+            logger.warning(f"Shared intent cache write failed: {e}")
+
+    def _put_local(self, key: str, intent: Intent):
+        if len(self._cache) >= INTENT_CACHE_MAX_ENTRIES:
+            now = time.monotonic()
+            self._cache = {k: v for k, v in self._cache.items() if v[1] > now}
+            if len(self._cache) >= INTENT_CACHE_MAX_ENTRIES:
+                del self._cache[next(iter(self._cache))]
+        self._cache[key] = (intent, time.monotonic() + INTENT_CACHE_TTL_SECONDS)
+
+    def _parse_intent(self, raw_response, session: ChatSession, user_message: str) -> Intent:
+        try:
+            intent_response = IntentClassificationResponse.model_validate(raw_response)
+            intent = intent_response.intent
+        except ValidationError as ve:
+            logger.error(f"Intent validation error: {ve}", exc_info=True)
+            self._observe(session, user_message, {"validation_error": str(ve)})
+            intent = Intent.UNCLEAR
+
+        self._observe(session, user_message, {"intent": intent.value})
+
+        return intent
+
+    def _observe(self, session: ChatSession, user_message: str, extra: dict):
+        langfuse_context.update_current_observation(
+            metadata={
+                "session_id": session.session_id,
+                "message_count": len(session.messages),
+                "user_message": user_message,
+                **extra
+            }
+        )
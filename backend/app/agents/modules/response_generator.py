@@ -1,6 +1,8 @@
 import logging
+from collections.abc import AsyncIterator
 
-from langchain.schema import AIMessage, BaseMessage, HumanMessage
+import orjson
+from langchain.schema import BaseMessage
 from langchain_openai import AzureChatOpenAI
 from langfuse.decorators import langfuse_context, observe
 from pydantic import ValidationError
@@ -13,13 +15,35 @@ from ...models import (
     ResponseGenerationResponse,
 )
 from ...models.assets import Asset, Cash, Crypto, Stock
+from .history_summarizer import conversation_history
 
 logger = logging.getLogger(__name__)
 
 
+RESPONSE_HISTORY_MESSAGES = 8
+FALLBACK_RESPONSE = "I encountered an error processing your request. Could you please rephrase?"
+
+# Fixed replies for messages that are nothing but a greeting or a "done"; no LLM call needed
+TEMPLATE_RESPONSES: dict[Intent, str] = {
+    Intent.START: (
+        "Hi! I'm here to help you build your portfolio. Tell me about an asset you own, "
+        "for example \"100 shares of AAPL\" or \"0.5 BTC\"."
+    ),
+    Intent.COMPLETE_PORTFOLIO: (
+        "Great, your portfolio is marked complete. You can review it in the summary, "
+        "or keep adding assets any time."
+    ),
+}
+
+
 class ResponseGenerator:
     def __init__(self, llm: AzureChatOpenAI):
         self.llm = llm
+        self.structured_llm = llm.with_structured_output(ResponseGenerationResponse)
+
+    def template_response(self, intent: Intent) -> ResponseGenerationResponse | None:
+        template = TEMPLATE_RESPONSES.get(intent)
+        return ResponseGenerationResponse(response=template) if template else None
 
     @observe(name="generate_response_tool")
     def generate_response(
@@ -29,57 +53,113 @@ class ResponseGenerator:
         intent: Intent,
         entities: list[EntityData]
     ) -> ResponseGenerationResponse:
-        conversation_history: list[BaseMessage] = []
-        for msg in session.messages[-8:]:
-            conversation_history.append(
-                HumanMessage(content=msg.content) if msg.role == "user"
-                else AIMessage(content=msg.content)
-            )
-
-        prompt_variables = {
-            "intent": intent,
-            "entities": entities,
-        }
-
-        messages = prompt_manager.build_messages(
-            system_prompt_name="chat-response-generator",
-            user_content=user_message,
-            system_variables=prompt_variables,
-            conversation_history=conversation_history
-        )
+        entities_json = self._entities_json(entities)
+        messages = self._build_messages(session, user_message, intent, entities_json)
 
+        try:
+            raw_response = self.structured_llm.invoke(messages, timeout=10)
+        except Exception as e:
+            logger.error(f"Response generation failed: {e}", exc_info=True)
+            self._observe(session, user_message, intent, {"error": str(e)})
+            return ResponseGenerationResponse(response=FALLBACK_RESPONSE)
 
-        def _observe(extra: dict):
-            langfuse_context.update_current_observation(
-                metadata={
-                    "session_id": session.session_id,
-                    "message_count": len(session.messages),
-                    "user_message": user_message,
-                    "intent": intent,
-                    **extra
-                }
-            )
+        return self._parse_response(raw_response, session, user_message, intent)
 
-        try:
-            raw_response = self.llm.with_structured_output(ResponseGenerationResponse).invoke(messages, timeout=10)
-            try:
-                result = ResponseGenerationResponse.model_validate(raw_response)
-            except ValidationError as ve:
-                logger.error(f"Response validation error: {ve}", exc_info=True)
-                _observe({"validation_error": str(ve)})
-                result = ResponseGenerationResponse(
-                    response="I encountered an error processing your request. Could you please rephrase?"
-                )
-
-            _observe({
-                "response_length": len(result.response)
-            })
-
-            return result
+    @observe(name="agenerate_response_tool")
+    async def agenerate_response(
+        self,
+        session: ChatSession,
+        user_message: str,
+        intent: Intent,
+        entities: list[EntityData]
+    ) -> ResponseGenerationResponse:
+        entities_json = self._entities_json(entities)
+        messages = self._build_messages(session, user_message, intent, entities_json)
 
+        try:
+            raw_response = await self.structured_llm.ainvoke(messages, timeout=10)
         except Exception as e:
             logger.error(f"Response generation failed: {e}", exc_info=True)
-            _observe({"error": str(e)})
-            return ResponseGenerationResponse(
-                response="I encountered an error processing your request. Could you please rephrase?"
-            )
+            self._observe(session, user_message, intent, {"error": str(e)})
+            return ResponseGenerationResponse(response=FALLBACK_RESPONSE)
+
+        return self._parse_response(raw_response, session, user_message, intent)
+
+    def _parse_response(
+        self,
+        raw_response,
+        session: ChatSession,
+        user_message: str,
+        intent: Intent
+    ) -> ResponseGenerationResponse:
+        try:
+            result = ResponseGenerationResponse.model_validate(raw_response)
+        except ValidationError as ve:
+            logger.error(f"Response validation error: {ve}", exc_info=True)
+            self._observe(session, user_message, intent, {"validation_error": str(ve)})
+            result = ResponseGenerationResponse(response=FALLBACK_RESPONSE)
+
+        self._observe(session, user_message, intent, {"response_length": len(result.response)})
+        return result
+
+    def _observe(self, session: ChatSession, user_message: str, intent: Intent, extra: dict):
+        langfuse_context.update_current_observation(
+            metadata={
+                "session_id": session.session_id,
+                "message_count": len(session.messages),
+                "user_message": user_message,
+                "intent": intent,
+                **extra
+            }
+        )
+
+    async def astream_response(
+        self,
+        session: ChatSession,
+        user_message: str,
+        intent: Intent,
+        entities: list[EntityData]
+    ) -> AsyncIterator[str]:
+        """Yield the response as text chunks as the model produces them."""
+        messages = self._build_messages(session, user_message, intent, self._entities_json(entities))
+        streamed = False
+        try:
+            # Plain text rather than structured output, so tokens can be forwarded as they arrive
+            async for chunk in self.llm.astream(messages, timeout=10):
+                if isinstance(chunk.content, str) and chunk.content:
+                    streamed = True
+                    yield chunk.content
+        except Exception as e:
+            logger.error(f"Response streaming failed: {e}", exc_info=True)
+
+        # A failed or empty stream still gives the user (and the stored turn) a reply
+        if not streamed:
+            yield FALLBACK_RESPONSE
+
+    def _build_messages(
+        self,
+        session: ChatSession,
+        user_message: str,
+        intent: Intent,
+        entities_json: str
+    ) -> list[BaseMessage]:
+        history = conversation_history(session, limit=RESPONSE_HISTORY_MESSAGES)
+
+        # Per-turn values go in a trailing context message, not the system prompt,
+        # so the provider can reuse its prompt cache for the static prefix
+        turn_context = f"User intent: {intent}"
+        if entities_json != "[]":
+            turn_context += f"\nExtracted entities: {entities_json}"
+
+        return prompt_manager.build_messages(
+            system_prompt_name="chat-response-generator-v2",
+            user_content=user_message,
+            conversation_history=history,
+            context_content=turn_context
+        )
+
+    def _entities_json(self, entities: list[EntityData]) -> str:
+        # Compact to save prompt tokens
+        if not entities:
+            return "[]"
+        return orjson.dumps([e.model_dump(mode="json", exclude_none=True) for e in entities]).decode()
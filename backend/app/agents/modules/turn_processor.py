@@ -0,0 +1,100 @@
+import logging
+
+from langchain_openai import AzureChatOpenAI
+from langfuse.decorators import langfuse_context, observe
+
+from ...config.prompts import prompt_manager
+from ...models import ChatSession, ChatTurnResponse, EntityData, Intent, IntentEntityResponse
+from .entity_extractor import ENTITY_INTENTS, EntityExtractor
+from .history_summarizer import conversation_history
+
+logger = logging.getLogger(__name__)
+
+
+class TurnProcessor:
+    """Fuses intent classification, entity extraction and optionally the reply into one structured LLM call."""
+
+    def __init__(self, llm: AzureChatOpenAI, entity_extractor: EntityExtractor):
+        self.llm = llm
+        self.entity_extractor = entity_extractor
+        # Strict JSON-schema decoding, as in EntityExtractor, so parsing never needs a fallback
+        self.structured_llm = llm.with_structured_output(ChatTurnResponse, method="json_schema", strict=True)
+        # Intent + entities without the reply runs on the extractor's (possibly smaller) model
+        self.classify_extract_llm = entity_extractor.llm.with_structured_output(
+            IntentEntityResponse,
+            method="json_schema",
+            strict=True
+        )
+
+    @observe(name="process_turn_tool")
+    async def aprocess_turn(
+        self,
+        session: ChatSession,
+        user_message: str
+    ) -> tuple[Intent, list[EntityData], str] | None:
+        history = conversation_history(session, limit=10)
+
+        messages = prompt_manager.build_messages(
+            system_prompt_name="chat-turn-processor",
+            user_content=user_message,
+            conversation_history=history
+        )
+
+        try:
+            result = ChatTurnResponse.model_validate(
+                await self.structured_llm.ainvoke(messages, timeout=10)
+            )
+        except Exception as e:
+            # Caller falls back to the separate classify/extract/respond calls
+            logger.error(f"Fused turn processing failed: {e}", exc_info=True)
+            langfuse_context.update_current_observation(metadata={"error": str(e)})
+            return None
+
+        entities: list[EntityData] = []
+        if result.intent in ENTITY_INTENTS:
+            entities = self.entity_extractor.resolve_entities(result.primary_entity, result.entities, session)
+
+        langfuse_context.update_current_observation(
+            metadata={
+                "session_id": session.session_id,
+                "intent": result.intent.value,
+                "entity_count": len(entities),
+                "response_length": len(result.response)
+            }
+        )
+        return result.intent, entities, result.response
+
+    @observe(name="classify_and_extract_tool")
+    async def aclassify_and_extract(
+        self,
+        session: ChatSession,
+        user_message: str
+    ) -> tuple[Intent, list[EntityData]] | None:
+        messages = prompt_manager.build_messages(
+            system_prompt_name="chat-intent-entity-extractor",
+            user_content=user_message,
+            conversation_history=conversation_history(session, limit=10)
+        )
+
+        try:
+            result = IntentEntityResponse.model_validate(
+                await self.classify_extract_llm.ainvoke(messages, timeout=8)
+            )
+        except Exception as e:
+            # Caller falls back to the separate classify/extract calls
+            logger.error(f"Fused intent/entity extraction failed: {e}", exc_info=True)
+            langfuse_context.update_current_observation(metadata={"error": str(e)})
+            return None
+
+        entities: list[EntityData] = []
+        if result.intent in ENTITY_INTENTS:
+            entities = self.entity_extractor.resolve_entities(result.primary_entity, result.entities, session)
+
+        langfuse_context.update_current_observation(
+            metadata={
+                "session_id": session.session_id,
+                "intent": result.intent.value,
+                "entity_count": len(entities)
+            }
+        )
+        return result.intent, entities
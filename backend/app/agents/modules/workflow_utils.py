@@ -1,4 +1,5 @@
 import logging
+import re
 
 from langfuse.decorators import langfuse_context, observe
 
@@ -6,6 +7,10 @@ from ...models import ChatAgentState
 
 logger = logging.getLogger(__name__)
 
+COMPLETION_KEYWORDS = ("done", "finish", "complete", "review", "that's all", "that's it", "show me", "see my")
+# One scan of the message for all keywords; plain substrings, so "finished" still matches
+COMPLETION_RE = re.compile("|".join(map(re.escape, COMPLETION_KEYWORDS)), re.IGNORECASE)
+
 
 class WorkflowUtils:
 
@@ -20,10 +25,7 @@ class WorkflowUtils:
             reason = "confirmation_ready"
         else:
             if state.entities:
-                keywords = ["done", "finish", "complete", "review", "that's all", "that's it", "show me", "see my"]
-                user_msg = state.user_message
-                user_msg_str = str(user_msg)
-                if any(keyword in user_msg_str.lower() for keyword in keywords):
+                if COMPLETION_RE.search(str(state.user_message)):
                     decision = "show_form"
                     reason = "user_indicated_completion"
 
@@ -1,46 +1,72 @@
 # backend/app/agents/portfolio_agent.py
 
-import hashlib
+import asyncio
+import io
 import logging
-import os
+import re
+import time
+from collections import Counter, defaultdict
 from datetime import datetime
+from functools import lru_cache
+from itertools import chain
 from typing import Any
+from uuid import uuid4
 
 from langfuse import Langfuse
 from langfuse.callback import CallbackHandler
 from langfuse.decorators import langfuse_context, observe
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import END, StateGraph
+from langgraph.types import Send
 
+from ..config.langfuse import langfuse_config
 from ..models import AnalysisResult, NewsItem, PortfolioAgentState
 from ..models.assets import Asset
 from ..models.portfolio import Portfolio
 from .services.vector_store import VectorStoreService as VectorStore
 from .tools import AnalysisTool, ClassificationTool, NewsSearchTool, PortfolioSummarizerTool
+from .utils import portfolio_hash
 
 logger = logging.getLogger(__name__)
 
 # Initialize Langfuse
-langfuse = Langfuse(
-    secret_key=os.getenv("LANGFUSE_SECRET_KEY"),
-    public_key=os.getenv("LANGFUSE_PUBLIC_KEY"),
-    host=os.getenv("LANGFUSE_HOST", "https://cloud.langfuse.com")
-)
+langfuse = Langfuse(**langfuse_config.client_kwargs())
+
+
+RISK_KEYWORDS_RE = re.compile(r"high risk|significant|warning|concern|volatile", re.IGNORECASE)
+
+# Assets with fewer recent vector DB hits than this get a fresh news search
+MIN_CACHED_NEWS_PER_ASSET = 2
+
+# Failed runs keep their checkpoints for a retry; older or excess ones are discarded
+FAILED_RUN_TTL_SECONDS = 3600
+MAX_FAILED_RUNS = 100
+
+VECTOR_QUERY_TEMPLATES = {
+    "stock": "{ticker} stock analysis news",
+    "crypto": "{symbol} cryptocurrency price analysis",
+    "real_estate": "real estate market analysis {address}",
+    "mortgage": "mortgage rates housing market analysis",
+    "cash": "{currency} currency analysis inflation",
+}
 
 
 class PortfolioAgent:
-    def __init__(self):
+    def __init__(self, checkpointer: BaseCheckpointSaver | None = None):
         # Initialize Langfuse
-        self.langfuse_handler = CallbackHandler(
-            secret_key=os.getenv("LANGFUSE_SECRET_KEY"),
-            public_key=os.getenv("LANGFUSE_PUBLIC_KEY"),
-            host=os.getenv("LANGFUSE_HOST", "https://cloud.langfuse.com")
-        )
+        self.langfuse_handler = CallbackHandler(**langfuse_config.client_kwargs())
 
+        self.vector_store = VectorStore()
         self.news_search_tool = NewsSearchTool()
-        self.classification_tool = ClassificationTool()
-        self.analysis_tool = AnalysisTool()
+        self.classification_tool = ClassificationTool(cache=self.vector_store.classification_cache)
+        self.analysis_tool = AnalysisTool(cache=self.vector_store.analysis_cache)
         self.summarizer_tool = PortfolioSummarizerTool()
-        self.vector_store = VectorStore()
+
+        # Checkpoints let a failed run resume from its last completed node
+        self.checkpointer = checkpointer or MemorySaver()
+        # run_key -> (thread_id, monotonic expiry), oldest first
+        self._failed_threads: dict[str, tuple[str, float]] = {}
 
         self.graph = self._build_graph()
 
@@ -56,7 +82,7 @@ class PortfolioAgent:
         workflow.add_node("search_vector_db", self._search_vector_db_node)
         workflow.add_node("search_news", self._search_news_node)
         workflow.add_node("classify_news", self._classify_news_node)
-        workflow.add_node("analyze_assets", self._analyze_assets_node)
+        workflow.add_node("analyze_asset", self._analyze_asset_node)
         workflow.add_node("create_digest", self._create_digest_node)
         workflow.add_node("store_results", self._store_results_node)
 
@@ -64,114 +90,111 @@ class PortfolioAgent:
         workflow.add_edge("initialize", "search_vector_db")
         workflow.add_conditional_edges(
             "search_vector_db",
-            self._should_search_news,
-            {
-                "search_news": "search_news",
-                "analyze": "analyze_assets"
-            }
+            self._route_after_vector_db,
+            ["search_news", "analyze_asset", "create_digest"]
         )
         workflow.add_edge("search_news", "classify_news")
-        workflow.add_edge("classify_news", "analyze_assets")
-        workflow.add_edge("analyze_assets", "create_digest")
+        # Fan out one analyze_asset branch per asset; create_digest joins them
+        workflow.add_conditional_edges(
+            "classify_news",
+            self._fan_out_analysis,
+            ["analyze_asset", "create_digest"]
+        )
+        workflow.add_edge("analyze_asset", "create_digest")
         workflow.add_edge("create_digest", "store_results")
         workflow.add_edge("store_results", END)
 
         logger.info("Portfolio agent workflow graph compiled successfully")
-        return workflow.compile() # type: ignore
+        return workflow.compile(checkpointer=self.checkpointer) # type: ignore
 
+    # Nodes return only the fields they change; list fields are merged by the
+    # operator.add reducers on PortfolioAgentState, so each node appends once.
     @observe(name="initialize_node")
-    def _initialize_node(self, state: PortfolioAgentState) -> PortfolioAgentState:
+    def _initialize_node(self, state: PortfolioAgentState) -> dict[str, Any]:
         logger.info("Starting portfolio analysis - Initialize node")
         result = self._initialize_analysis_wrapped(
             portfolio=state.portfolio,
             task_type=state.task_type,
             user_query=state.user_query if state.user_query else ""
         )
-        state.current_step = result.current_step if result.current_step else "initialize"
-        state["assets_to_analyze"] = result.get("assets_to_analyze", [])
-        state["processed_assets"] = result.get("processed_assets", [])
-        state["raw_news"] = result.get("raw_news", [])
-        state["classified_news"] = result.get("classified_news", [])
-        state["analysis_results"] = result.get("analysis_results", [])
-        state["recommendations"] = result.get("recommendations", [])
-        state["risk_alerts"] = result.get("risk_alerts", [])
-        state["errors"] = result.get("errors", [])
-        logger.info(f"Initialize node completed - {len(state['assets_to_analyze'])} assets to analyze")
-        return state
+        assets_to_analyze = result.get("assets_to_analyze", [])
+        logger.info(f"Initialize node completed - {len(assets_to_analyze)} assets to analyze")
+        return {
+            "current_step": result.get("current_step", "initialize"),
+            "assets_to_analyze": assets_to_analyze
+        }
 
     #nodes
     @observe(name="search_vector_db_node")
-    def _search_vector_db_node(self, state: PortfolioAgentState) -> PortfolioAgentState:
+    async def _search_vector_db_node(self, state: PortfolioAgentState) -> dict[str, Any]:
         logger.info("Searching vector database for existing information")
-        result = self._search_vector_db_wrapped(
-            assets=state["assets_to_analyze"],
+        result = await self._search_vector_db_wrapped(
+            assets=state.assets_to_analyze,
             days_back=7
         )
-        state["vector_context"] = result
         found_items = result.get("found_items", 0)
         logger.info(f"Vector DB search completed - Found {found_items} relevant items")
-        return state
+        return {"current_step": "search_vector_db", "vector_context": result}
 
     @observe(name="search_news_node")
-    def _search_news_node(self, state: PortfolioAgentState) -> PortfolioAgentState:
+    async def _search_news_node(self, state: PortfolioAgentState) -> dict[str, Any]:
         logger.info("Starting news search for assets")
-        result = self._search_news_wrapped(
-            assets=state["assets_to_analyze"],
+        result = await self._search_news_wrapped(
+            assets=self._assets_needing_search(state),
             use_bing=False
         )
-        state["raw_news"] = result
         logger.info(f"News search completed - Found {len(result)} news items across all assets")
-        return state
+        return {"current_step": "search_news", "raw_news": result}
 
     @observe(name="classify_news_node")
-    def _classify_news_node(self, state: PortfolioAgentState) -> PortfolioAgentState:
-        logger.info(f"Classifying {len(state['raw_news'])} news items")
-        result = self._classify_news_wrapped(
-            news_items=state["raw_news"],
-            assets=state["assets_to_analyze"]
+    async def _classify_news_node(self, state: PortfolioAgentState) -> dict[str, Any]:
+        logger.info(f"Classifying {len(state.raw_news)} news items")
+        result = await self._classify_news_wrapped(
+            news_items=state.raw_news,
+            assets=state.assets_to_analyze
         )
-        state["classified_news"] = result
         logger.info(f"News classification completed - {len(result)} items classified")
-        return state
-
-    @observe(name="analyze_assets_node")
-    def _analyze_assets_node(self, state: PortfolioAgentState) -> PortfolioAgentState:
-        logger.info(f"Starting detailed analysis of {len(state['assets_to_analyze'])} assets")
-        result = self._analyze_assets_wrapped(
-            assets=state["assets_to_analyze"],
-            classified_news=state.get("classified_news", [])
-        )
-        state["analysis_results"] = result
-        logger.info(f"Asset analysis completed - Generated {len(result)} analysis results")
-        return state
+        return {"current_step": "classify_news", "classified_news": result}
+
+    @observe(name="analyze_asset_node")
+    async def _analyze_asset_node(self, payload: dict[str, Any]) -> dict[str, Any]:
+        asset: Asset = payload["asset"]
+        result = await self._analyze_asset_wrapped(asset=asset, asset_news=payload["news"])
+        if result is None:
+            return {"errors": [f"Analysis failed for {asset.key}"]}
+        return {"analysis_results": [result], "processed_assets": [asset.key]}
 
     @observe(name="create_digest_node")
-    def _create_digest_node(self, state: PortfolioAgentState) -> PortfolioAgentState:
+    def _create_digest_node(self, state: PortfolioAgentState) -> dict[str, Any]:
         logger.info("Creating portfolio digest and final response")
         result = self._create_digest_wrapped(
-            analysis_results=state["analysis_results"],
-            task_type=state["task_type"]
+            analysis_results=state.analysis_results,
+            task_type=state.task_type
         )
-        state["final_response"] = result.get("final_response", "")
-        state["recommendations"] = result.get("recommendations", [])
-        state["risk_alerts"] = result.get("risk_alerts", [])
-        logger.info(f"Digest created - {len(state['recommendations'])} recommendations, {len(state['risk_alerts'])} risk alerts")
-        return state
+        recommendations = result.get("recommendations", [])
+        risk_alerts = result.get("risk_alerts", [])
+        logger.info(f"Digest created - {len(recommendations)} recommendations, {len(risk_alerts)} risk alerts")
+        return {
+            "current_step": "create_digest",
+            "final_response": result.get("final_response", ""),
+            "recommendations": recommendations,
+            "risk_alerts": risk_alerts
+        }
 
     @observe(name="store_results_node")
-    def _store_results_node(self, state: PortfolioAgentState) -> PortfolioAgentState:
+    def _store_results_node(self, state: PortfolioAgentState) -> dict[str, Any]:
         logger.info("Storing analysis results to vector database")
         self._store_results_wrapped(
-            portfolio=state["portfolio"],
+            portfolio=state.portfolio,
             analysis_summary={
-                "type": state["task_type"],
-                "summary": state.get("final_response", ""),
-                "recommendations": state.get("recommendations", []),
-                "risk_alerts": state.get("risk_alerts", [])
+                "type": state.task_type,
+                "summary": state.final_response or "",
+                "recommendations": state.recommendations,
+                "risk_alerts": state.risk_alerts
             }
         )
         logger.info("Results stored successfully")
-        return state
+        return {"current_step": "store_results"}
 
     #tools
     @observe(name="initialize_analysis_tool")
@@ -185,10 +208,7 @@ class PortfolioAgent:
         logger.info(f"Initializing {task_type} analysis for portfolio with {len(portfolio.assets)} assets")
 
         # Log asset types for visibility
-        asset_types = [asset.type for asset in portfolio.assets]
-        asset_summary = {}
-        for asset_type in asset_types:
-            asset_summary[asset_type] = asset_summary.get(asset_type, 0) + 1
+        asset_summary = {asset_type: len(assets) for asset_type, assets in portfolio.by_type.items()}
 
         logger.info(f"Portfolio composition: {asset_summary}")
 
@@ -214,7 +234,7 @@ class PortfolioAgent:
         }
 
     @observe(name="search_vector_db_tool")
-    def _search_vector_db_wrapped(self, assets: list[Asset], days_back: int = 7) -> dict[str, Any]:
+    async def _search_vector_db_wrapped(self, assets: list[Asset], days_back: int = 7) -> dict[str, Any]:
         logger.info(f"Searching vector database for existing information (last {days_back} days)")
 
         try:
@@ -222,50 +242,44 @@ class PortfolioAgent:
             asset_keys = []
 
             for asset in assets:
-                if asset.type == "stock":
-                    query = f"{asset.ticker} stock analysis news"
-                    asset_key = f"stock:{asset.ticker}"
-                    logger.debug(f"Added stock query: {query}")
-                elif asset.type == "crypto":
-                    query = f"{asset.symbol} cryptocurrency price analysis"
-                    asset_key = f"crypto:{asset.symbol}"
-                    logger.debug(f"Added crypto query: {query}")
-                elif asset.type == "real_estate":
-                    query = f"real estate market analysis {asset.address}"
-                    asset_key = f"real_estate:{asset.address}"
-                    logger.debug(f"Added real estate query: {query}")
-                elif asset.type == "mortgage":
-                    query = "mortgage rates housing market analysis"
-                    asset_key = f"mortgage:{asset.lender}"
-                    logger.debug(f"Added mortgage query: {query}")
-                elif asset.type == "cash":
-                    query = f"{asset.currency} currency analysis inflation"
-                    asset_key = f"cash:{asset.currency}"
-                    logger.debug(f"Added cash query: {query}")
-                else:
+                template = VECTOR_QUERY_TEMPLATES.get(asset.type)
+                if template is None:
                     logger.warning(f"Unknown asset type: {asset.type}")
                     continue
 
+                query = template.format(**asset.model_dump())
+                logger.debug(f"Added {asset.type} query: {query}")
                 portfolio_queries.append(query)
-                asset_keys.append(asset_key)
-
-            logger.info(f"Executing {len(portfolio_queries)} vector database queries")
-            vector_results = []
-            for i, query in enumerate(portfolio_queries):
-                logger.debug(f"Query {i+1}/{len(portfolio_queries)}: {query}")
-                results = self.vector_store.search_relevant_news(
-                    query=query,
-                    asset_keys=asset_keys,
-                    days_back=days_back,
-                    limit=5
-                )
-                vector_results.extend(results)
-                logger.debug(f"Found {len(results)} items for query {i+1}")
+                asset_keys.append(asset.key)
+
+            logger.info(f"Executing {len(portfolio_queries)} vector database queries in one batch")
+            query_results = await asyncio.to_thread(
+                self.vector_store.search_many,
+                queries=portfolio_queries,
+                asset_keys=asset_keys,
+                days_back=days_back,
+                limit=5
+            )
+
+            # Hits are credited to the asset each query searched for before deduplicating, so an
+            # article stored for two assets still counts for both
+            asset_hits: Counter[str] = Counter()
+            # Deduplicate by url so overlapping hits across queries are kept once
+            unique_results: dict[str, dict] = {}
+            for i, (asset_key, results) in enumerate(zip(asset_keys, query_results, strict=True), 1):
+                urls = {item["metadata"].get("url") or item["document"] for item in results}
+                asset_hits[asset_key] += len(urls)
+                for item in results:
+                    key = item["metadata"].get("url") or item["document"]
+                    unique_results.setdefault(key, item)
+                logger.debug(f"Found {len(results)} items for query {i}")
+            vector_results = list(unique_results.values())
 
             langfuse_context.update_current_observation(
                 metadata={
                     "found_items": len(vector_results),
                     "asset_keys_searched": asset_keys,
+                    "asset_hits": dict(asset_hits),
                     "queries_executed": len(portfolio_queries)
                 }
             )
@@ -273,37 +287,44 @@ class PortfolioAgent:
             logger.info(f"Vector DB search completed: {len(vector_results)} relevant items found")
             return {
                 "found_items": len(vector_results),
+                "asset_hits": dict(asset_hits),
                 "results": vector_results
             }
 
         except Exception as e:
             logger.error(f"Vector DB search failed: {e}")
-            return {"found_items": 0, "results": []}
+            return {"found_items": 0, "asset_hits": {}, "results": []}
 
     @observe(name="search_news_tool")
-    def _search_news_wrapped(self, assets: list[Asset], use_bing: bool = False) -> list[NewsItem]:
+    async def _search_news_wrapped(self, assets: list[Asset], use_bing: bool = False) -> list[NewsItem]:
         news_source = "Bing" if use_bing else "default news API"
         logger.info(f"Searching for news using {news_source} for {len(assets)} assets")
 
+        # Fire every asset search at once, the calls are independent HTTP round-trips
+        search_results = await asyncio.gather(
+            *(self.news_search_tool.asearch_for_asset(asset, use_bing=use_bing) for asset in assets),
+            return_exceptions=True
+        )
+
         all_news = []
 
-        for i, asset in enumerate(assets, 1):
+        for i, (asset, news_items) in enumerate(zip(assets, search_results, strict=True), 1):
             try:
-                asset_key = self.analysis_tool._get_asset_key(asset)
-                logger.info(f"🔍 Asset {i}/{len(assets)}: Searching news for {asset_key}")
+                if isinstance(news_items, BaseException):
+                    raise news_items
 
-                news_items = self.news_search_tool.search_for_asset(asset, use_bing=use_bing)
+                asset_key = asset.key
+                logger.info(f"🔍 Asset {i}/{len(assets)}: Searched news for {asset_key}")
 
                 # Add asset relation
-                for item in news_items:
-                    item.asset_related = asset_key
+                news_items = [item.model_copy(update={"asset_related": asset_key}) for item in news_items]
 
                 all_news.extend(news_items)
 
                 if news_items:
                     logger.info(f"Found {len(news_items)} news items for {asset_key}")
-                    self.vector_store.store_news_items(news_items, asset_key)
-                    logger.debug(f"Stored {len(news_items)} news items in vector DB for {asset_key}")
+                    self.vector_store.submit_news_items(news_items, asset_key)
+                    logger.debug(f"Queued {len(news_items)} news items for vector DB storage for {asset_key}")
                 else:
                     logger.warning(f"No news found for {asset_key}")
 
@@ -322,43 +343,33 @@ class PortfolioAgent:
         return all_news
 
     @observe(name="classify_news_tool")
-    def _classify_news_wrapped(
+    async def _classify_news_wrapped(
         self,
         news_items: list[NewsItem],
         assets: list[Asset]
     ) -> list[NewsItem]:
         logger.info(f"Classifying {len(news_items)} news items for {len(assets)} assets")
 
-        classified_news = []
-
         # Group by asset
-        asset_news_map = {}
+        asset_news_map: defaultdict[str | None, list[NewsItem]] = defaultdict(list)
         for news_item in news_items:
-            asset_key = news_item.asset_related
-            if asset_key not in asset_news_map:
-                asset_news_map[asset_key] = []
-            asset_news_map[asset_key].append(news_item)
+            asset_news_map[news_item.asset_related].append(news_item)
 
         logger.info(f"News distribution: {[(k, len(v)) for k, v in asset_news_map.items()]}")
 
+        pairs: list[tuple[NewsItem, Asset]] = []
         for i, asset in enumerate(assets, 1):
-            asset_key = self.analysis_tool._get_asset_key(asset)
+            asset_key = asset.key
             items = asset_news_map.get(asset_key, [])
 
-            logger.info(f"Asset {i}/{len(assets)}: Classifying {len(items)} news items for {asset_key}")
-
-            classified_count = 0
-            for news_item in items:
-                try:
-                    classified_item = self.classification_tool.classify_news_item(news_item, asset)
-                    classified_news.append(classified_item)
-                    classified_count += 1
-                except Exception as e:
-                    logger.error(f"❌ Classification failed for news item: {e}")
-                    classified_news.append(news_item)
+            logger.info(f"Asset {i}/{len(assets)}: Queued {len(items)} news items for {asset_key}")
+            pairs.extend((news_item, asset) for news_item in items)
 
-            if items:
-                logger.info(f"Classified {classified_count}/{len(items)} items for {asset_key}")
+        try:
+            classified_news = await self.classification_tool.aclassify_batch(pairs)
+        except Exception as e:
+            logger.error(f"❌ Batch classification failed: {e}")
+            classified_news = [news_item for news_item, _ in pairs]
 
         langfuse_context.update_current_observation(
             metadata={
@@ -371,53 +382,28 @@ class PortfolioAgent:
         logger.info(f"News classification completed: {len(classified_news)}/{len(news_items)} items classified")
         return classified_news
 
-    @observe(name="analyze_assets_tool")
-    def _analyze_assets_wrapped(
-        self,
-        assets: list[Asset],
-        classified_news: list[NewsItem]
-    ) -> list[AnalysisResult]:
-        logger.info(f"Starting detailed analysis of {len(assets)} assets with {len(classified_news)} classified news items")
-
-        analysis_results = []
-
-        # Group news by asset for easier processing
-        news_by_asset = {}
-        for item in classified_news:
-            if item.asset_related not in news_by_asset:
-                news_by_asset[item.asset_related] = []
-            news_by_asset[item.asset_related].append(item)
-
-        for i, asset in enumerate(assets, 1):
-            try:
-                asset_key = self.analysis_tool._get_asset_key(asset)
-                asset_news = news_by_asset.get(asset_key, [])
-
-                logger.info(f"Asset {i}/{len(assets)}: Analyzing {asset_key} with {len(asset_news)} news items")
-
-                # Analyze
-                analysis_result = self.analysis_tool.analyze_asset(asset, asset_news)
-                analysis_results.append(analysis_result)
-
-                logger.info(f"Analysis completed for {asset_key} - Confidence: {analysis_result.confidence_score:.2f}")
-                logger.debug(f"Sentiment: {analysis_result.sentiment_summary}")
-                logger.debug(f"Recommendations: {len(analysis_result.recommendations)}")
-
-            except Exception as e:
-                logger.error(f"Asset analysis failed for {asset}: {e}")
+    @observe(name="analyze_asset_tool")
+    async def _analyze_asset_wrapped(self, asset: Asset, asset_news: list[NewsItem]) -> AnalysisResult | None:
+        logger.info(f"Analyzing {asset.key} with {len(asset_news)} news items")
 
-        avg_confidence = sum(r.confidence_score for r in analysis_results) / len(analysis_results) if analysis_results else 0
+        try:
+            analysis_result = await self.analysis_tool.aanalyze_asset(asset, asset_news)
+        except Exception as e:
+            logger.error(f"Asset analysis failed for {asset}: {e}")
+            return None
 
         langfuse_context.update_current_observation(
             metadata={
-                "assets_analyzed": len(analysis_results),
-                "average_confidence": avg_confidence,
-                "high_confidence_count": sum(1 for r in analysis_results if r.confidence_score > 0.7)
+                "asset_key": asset.key,
+                "news_count": len(asset_news),
+                "confidence": analysis_result.confidence_score
             }
         )
 
-        logger.info(f"Asset analysis completed: {len(analysis_results)} assets analyzed, avg confidence: {avg_confidence:.2f}")
-        return analysis_results
+        logger.info(f"Analysis completed for {asset.key} - Confidence: {analysis_result.confidence_score:.2f}")
+        logger.debug(f"Sentiment: {analysis_result.sentiment_summary}")
+        logger.debug(f"Recommendations: {len(analysis_result.recommendations)}")
+        return analysis_result
 
     @observe(name="create_digest_tool")
     def _create_digest_wrapped(
@@ -430,64 +416,61 @@ class PortfolioAgent:
         try:
             digest = self.summarizer_tool.create_portfolio_digest(analysis_results)
 
-            all_recommendations = []
-            risk_alerts = []
-
-            for result in analysis_results:
-                all_recommendations.extend(result.recommendations)
-
-                if (result.confidence_score > 0.6 and
-                    any(keyword in result.risk_assessment.lower()
-                        for keyword in ['high risk', 'significant', 'warning', 'concern', 'volatile'])):
-                    risk_alerts.append(f"{result.asset_key}: {result.risk_assessment}")
+            # dict.fromkeys dedupes while keeping first-seen order
+            unique_recommendations = list(dict.fromkeys(
+                chain.from_iterable(result.recommendations for result in analysis_results)
+            ))
+            risk_alerts = [
+                f"{result.asset_key}: {result.risk_assessment}"
+                for result in analysis_results
+                if result.confidence_score > 0.6 and RISK_KEYWORDS_RE.search(result.risk_assessment)
+            ]
 
             # Build response
-            response_parts = [
-                f"# Portfolio Analysis Report - {datetime.now().strftime('%Y-%m-%d %H:%M')}",
-                "\n## Executive Summary",
-                digest.get("summary", "Analysis completed."),
-                "\n## Portfolio Overview",
-                f"- **Assets Analyzed**: {digest.get('total_assets_analyzed', 0)}",
-                f"- **High Confidence Analyses**: {digest.get('high_confidence_analyses', 0)}",
-                f"- **Average Confidence**: {digest.get('average_confidence', 0):.2f}",
+            buf = io.StringIO()
+            write = buf.write
+            write(
+                f"# Portfolio Analysis Report - {datetime.now().strftime('%Y-%m-%d %H:%M')}\n"
+                "\n## Executive Summary\n"
+                f"{digest.get('summary', 'Analysis completed.')}\n"
+                "\n## Portfolio Overview\n"
+                f"- **Assets Analyzed**: {digest.get('total_assets_analyzed', 0)}\n"
+                f"- **High Confidence Analyses**: {digest.get('high_confidence_analyses', 0)}\n"
+                f"- **Average Confidence**: {digest.get('average_confidence', 0):.2f}\n"
                 f"- **Risk Alerts**: {len(risk_alerts)}"
-            ]
+            )
 
             if risk_alerts:
-                response_parts.extend([
-                    "\n## ⚠️ Risk Alerts",
-                    "\n".join(f"- {alert}" for alert in risk_alerts)
-                ])
+                write("\n\n## ⚠️ Risk Alerts\n")
+                write("\n".join(f"- {alert}" for alert in risk_alerts))
 
             if digest.get("portfolio_recommendations"):
-                response_parts.extend([
-                    "\n## 📋 Key Recommendations",
-                    "\n".join(f"- {rec}" for rec in digest["portfolio_recommendations"][:5])
-                ])
+                write("\n\n## 📋 Key Recommendations\n")
+                write("\n".join(f"- {rec}" for rec in digest["portfolio_recommendations"][:5]))
 
-            response_parts.append("\n## 📊 Asset Analysis Summary")
+            write("\n\n## 📊 Asset Analysis Summary")
             for result in analysis_results:
-                response_parts.extend([
-                    f"\n### {result.asset_key}",
-                    f"**Sentiment**: {result.sentiment_summary}",
-                    f"**Risk Assessment**: {result.risk_assessment}",
-                    f"**Top Recommendations**: {', '.join(result.recommendations[:2])}",
+                write(
+                    f"\n\n### {result.asset_key}\n"
+                    f"**Sentiment**: {result.sentiment_summary}\n"
+                    f"**Risk Assessment**: {result.risk_assessment}\n"
+                    f"**Top Recommendations**: {', '.join(result.recommendations[:2])}\n"
                     f"**Confidence**: {result.confidence_score:.2f}"
-                ])
+                )
 
-            final_response = "\n".join(response_parts)
+            final_response = buf.getvalue()
 
             langfuse_context.update_current_observation(
                 metadata={
                     "digest_created": True,
                     "risk_alerts_count": len(risk_alerts),
-                    "recommendations_count": len(set(all_recommendations))
+                    "recommendations_count": len(unique_recommendations)
                 }
             )
 
             return {
                 "final_response": final_response,
-                "recommendations": list(set(all_recommendations)),
+                "recommendations": unique_recommendations,
                 "risk_alerts": risk_alerts
             }
 
@@ -508,25 +491,23 @@ class PortfolioAgent:
         logger.info("Storing analysis results")
 
         try:
-            # Create portfolio hash
-            portfolio_str = str(sorted([str(asset) for asset in portfolio.assets]))
-            portfolio_hash = hashlib.md5(portfolio_str.encode()).hexdigest()
+            digest_key = portfolio_hash(portfolio)
 
             # Add metadata
             analysis_summary["total_assets"] = len(portfolio.assets)
             analysis_summary["timestamp"] = datetime.now().isoformat()
 
-            # Store in vector DB
-            self.vector_store.store_analysis_result(analysis_summary, portfolio_hash)
+            # Store in vector DB without holding up the response
+            self.vector_store.submit_analysis_result(analysis_summary, digest_key)
 
             langfuse_context.update_current_observation(
                 metadata={
-                    "stored": True,
-                    "portfolio_hash": portfolio_hash
+                    "queued": True,
+                    "portfolio_hash": digest_key
                 }
             )
 
-            logger.info("Analysis results stored successfully")
+            logger.info("Analysis results queued for storage")
 
         except Exception as e:
             logger.error(f"Failed to store results: {e}")
@@ -534,37 +515,96 @@ class PortfolioAgent:
     #helpers
     @observe(name="should_search_news")
     def _should_search_news(self, state: PortfolioAgentState) -> str:
-        vector_context = state.get("vector_context") or {}
-        found_items = vector_context.get("found_items", 0)
-        threshold = len(state["assets_to_analyze"]) * 2
+        needs_search = self._assets_needing_search(state)
 
         decision = "search_news"
-        if found_items >= threshold:
-            logger.info(f"🎯 Sufficient recent data found in vector DB ({found_items} >= {threshold}), skipping news search")
+        if not needs_search:
+            logger.info("🎯 Sufficient recent data found in vector DB for every asset, skipping news search")
             decision = "analyze"
         else:
-            logger.info(f"🔍 Insufficient recent data ({found_items} < {threshold}), proceeding with news search")
+            logger.info(
+                f"🔍 Insufficient recent data for {len(needs_search)}/{len(state.assets_to_analyze)} assets, "
+                "proceeding with news search"
+            )
 
         langfuse_context.update_current_observation(
             metadata={
                 "decision": decision,
-                "found_items": found_items,
-                "threshold": threshold,
-                "assets_count": len(state["assets_to_analyze"])
+                "assets_needing_search": [asset.key for asset in needs_search],
+                "threshold": MIN_CACHED_NEWS_PER_ASSET,
+                "assets_count": len(state.assets_to_analyze)
             }
         )
 
         return decision
 
+    def _route_after_vector_db(self, state: PortfolioAgentState) -> str | list[Send]:
+        if self._should_search_news(state) == "search_news":
+            return "search_news"
+        return self._fan_out_analysis(state)
+
+    def _fan_out_analysis(self, state: PortfolioAgentState) -> str | list[Send]:
+        assets = state.assets_to_analyze
+        if not assets:
+            return "create_digest"
+
+        classified_news = state.classified_news
+        news_by_asset: defaultdict[str | None, list[NewsItem]] = defaultdict(list)
+        # Single pass over fresh and cached news; no merged intermediate list
+        for item in chain(classified_news, self._cached_news_items(state.vector_context, classified_news)):
+            news_by_asset[item.asset_related].append(item)
+
+        logger.info(f"Fanning out analysis across {len(assets)} assets")
+        return [
+            Send("analyze_asset", {"asset": asset, "news": news_by_asset.get(asset.key, [])})
+            for asset in assets
+        ]
+
+    def _assets_needing_search(self, state: PortfolioAgentState) -> list[Asset]:
+        asset_hits = (state.vector_context or {}).get("asset_hits", {})
+        return [
+            asset for asset in state.assets_to_analyze
+            if asset_hits.get(asset.key, 0) < MIN_CACHED_NEWS_PER_ASSET
+        ]
+
+    def _cached_news_items(self, vector_context: dict | None, fresh_news: list[NewsItem]) -> list[NewsItem]:
+        """Turn vector DB hits into news items, skipping any already fetched fresh."""
+        seen_urls = {item.url for item in fresh_news}
+        cached = []
+        for hit in (vector_context or {}).get("results", []):
+            metadata = hit["metadata"]
+            if not metadata.get("url") or metadata["url"] in seen_urls:
+                continue
+            seen_urls.add(metadata["url"])
+            cached.append(NewsItem.model_construct(
+                title=metadata.get("title", ""),
+                snippet=metadata.get("snippet", ""),
+                url=metadata["url"],
+                source=metadata.get("source") or None,
+                sentiment=metadata.get("sentiment") or None,
+                impact=metadata.get("impact") or None,
+                relevance_score=metadata.get("relevance_score"),
+                asset_related=metadata.get("asset_key")
+            ))
+        return cached
+
     @observe(name="analyze_portfolio")
-    def analyze_portfolio(
+    async def analyze_portfolio(
         self,
         portfolio: Portfolio,
         task_type: str = "analyze",
-        user_query: str = ""
+        user_query: str = "",
+        resume: bool = False
     ) -> dict:
         logger.info(f"🚀 Starting portfolio analysis - Task: {task_type}, Assets: {len(portfolio.assets)}")
 
+        run_key = f"{portfolio_hash(portfolio)}:{task_type}"
+        failed = self._failed_threads.get(run_key) if resume else None
+        thread_id = failed[0] if failed and failed[1] > time.monotonic() else None
+        resuming = thread_id is not None
+        if thread_id is None:
+            thread_id = f"{run_key}:{uuid4().hex}"
+
         trace = langfuse.trace( # type: ignore
             name="portfolio_analysis",
             metadata={
@@ -596,8 +636,18 @@ class PortfolioAgent:
                 }
             )
 
-            logger.info("Invoking analysis workflow graph")
-            result = self.graph.invoke(initial_state) # type: ignore
+            config = {"configurable": {"thread_id": thread_id}}
+            if resuming:
+                logger.info(f"Resuming analysis workflow from last checkpoint of {thread_id}")
+                result = await self.graph.ainvoke(None, config=config) # type: ignore
+            else:
+                logger.info("Invoking analysis workflow graph")
+                result = await self.graph.ainvoke(initial_state, config=config) # type: ignore
+
+            previous = self._failed_threads.pop(run_key, None)
+            if previous and previous[0] != thread_id:
+                await self._discard_checkpoints(previous[0])
+            await self._discard_checkpoints(thread_id)
 
             execution_time = (datetime.now() - start_time).total_seconds()
             logger.info(f"⏱️ Analysis workflow completed in {execution_time:.2f} seconds")
@@ -633,6 +683,7 @@ class PortfolioAgent:
         except Exception as e:
             execution_time = (datetime.now() - start_time).total_seconds() if 'start_time' in locals() else 0
             logger.error(f"Portfolio analysis failed after {execution_time:.2f}s: {e}")
+            await self._remember_failed_run(run_key, thread_id)
 
             error_response = {
                 "success": False,
@@ -648,10 +699,41 @@ class PortfolioAgent:
 
             return error_response
 
-    def create_scheduled_digest(self, portfolio: Portfolio) -> dict:
-        logger.info("Creating scheduled portfolio digest")
-        return self.analyze_portfolio(portfolio, task_type="digest")
+    async def _remember_failed_run(self, run_key: str, thread_id: str):
+        previous = self._failed_threads.pop(run_key, None)
+        if previous and previous[0] != thread_id:
+            await self._discard_checkpoints(previous[0])
+
+        now = time.monotonic()
+        for key, (old_thread_id, expires_at) in list(self._failed_threads.items()):
+            if expires_at > now and len(self._failed_threads) < MAX_FAILED_RUNS:
+                break
+            del self._failed_threads[key]
+            await self._discard_checkpoints(old_thread_id)
+        self._failed_threads[run_key] = (thread_id, now + FAILED_RUN_TTL_SECONDS)
+
+    async def _discard_checkpoints(self, thread_id: str):
+        # Completed runs have nothing to resume, so don't let checkpoints pile up
+        try:
+            await self.checkpointer.adelete_thread(thread_id)
+        except Exception as e:
+            logger.debug(f"Could not discard checkpoints for {thread_id}: {e}")
 
-    def get_portfolio_alerts(self, portfolio: Portfolio) -> dict:
+    async def create_scheduled_digest(self, portfolio: Portfolio) -> dict:
+        logger.info("Creating scheduled portfolio digest")
+        result = await self.analyze_portfolio(portfolio, task_type="digest")
+        if not result.get("success"):
+            # One retry from the failed run's last checkpoint, so completed nodes are not redone
+            logger.warning("Scheduled digest failed, retrying from last checkpoint")
+            result = await self.analyze_portfolio(portfolio, task_type="digest", resume=True)
+        return result
+
+    async def get_portfolio_alerts(self, portfolio: Portfolio) -> dict:
         logger.info("Generating portfolio alerts")
-        return self.analyze_portfolio(portfolio, task_type="alert")
+        return await self.analyze_portfolio(portfolio, task_type="alert")
+
+
+@lru_cache(maxsize=1)
+def get_portfolio_agent() -> PortfolioAgent:
+    """Process-wide agent, so the compiled graph, LLM clients and embedding model are built once."""
+    return PortfolioAgent()
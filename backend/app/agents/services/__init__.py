@@ -1,7 +1,8 @@
 from .portfolio_service import PortfolioService
-from .vector_store import VectorStoreService
+from .vector_store import SemanticCache, VectorStoreService
 
 __all__ = [
     "PortfolioService",
+    "SemanticCache",
     "VectorStoreService"
 ]
@@ -1,4 +1,5 @@
 import logging
+from collections.abc import Callable
 from datetime import datetime
 from typing import Any
 from uuid import UUID
@@ -24,6 +25,67 @@ from ...models import (
 
 logger = logging.getLogger(__name__)
 
+# Keyed by concrete asset class: one dict lookup per asset instead of an isinstance chain
+_ASSET_DATA_HANDLERS: dict[type, Callable[[Any], tuple[str, str, float, dict]]] = {
+    Stock: lambda a: (a.ticker, "stock", a.shares, {"ticker": a.ticker}),
+    Crypto: lambda a: (a.symbol, "crypto", a.amount, {"symbol": a.symbol}),
+    RealEstate: lambda a: (a.address, "real_estate", a.market_value, {
+        "address": a.address,
+        "market_value": a.market_value
+    }),
+    Mortgage: lambda a: (a.lender, "mortgage", a.balance, {
+        "lender": a.lender,
+        "property_address": a.property_address
+    }),
+    Cash: lambda a: (a.currency, "cash", a.amount, {"currency": a.currency}),
+}
+
+_SUMMARY_HANDLERS: dict[type, Callable[[Any], dict[str, Any]]] = {
+    Stock: lambda a: {
+        "type": "stock",
+        "symbol": a.ticker,
+        "quantity": a.shares,
+        "display": f"{a.ticker} ({a.shares} shares)"
+    },
+    Crypto: lambda a: {
+        "type": "crypto",
+        "symbol": a.symbol,
+        "quantity": a.amount,
+        "display": f"{a.symbol} ({a.amount})"
+    },
+    RealEstate: lambda a: {
+        "type": "real_estate",
+        "address": a.address,
+        "value": a.market_value,
+        "display": f"Property: ${a.market_value:,.0f}"
+    },
+    Mortgage: lambda a: {
+        "type": "mortgage",
+        "lender": a.lender,
+        "balance": a.balance,
+        "display": f"Mortgage ({a.lender}): ${a.balance:,.0f}"
+    },
+    Cash: lambda a: {
+        "type": "cash",
+        "currency": a.currency,
+        "amount": a.amount,
+        "display": f"Cash: {a.currency} ${a.amount:,.2f}"
+    },
+}
+
+# Keyed by the DB asset_type column; called with (symbol, quantity, meta)
+_DB_ASSET_BUILDERS: dict[str, Callable[[str, float, dict], Asset]] = {
+    "stock": lambda symbol, quantity, meta: Stock(ticker=symbol, shares=quantity),
+    "crypto": lambda symbol, quantity, meta: Crypto(symbol=symbol, amount=quantity),
+    "real_estate": lambda symbol, quantity, meta: RealEstate(address=symbol, market_value=quantity),
+    "mortgage": lambda symbol, quantity, meta: Mortgage(
+        lender=symbol,
+        balance=quantity,
+        property_address=meta.get("property_address")
+    ),
+    "cash": lambda symbol, quantity, meta: Cash(currency=symbol, amount=quantity),
+}
+
 
 class PortfolioService:
     def __init__(self, db: Session):
@@ -380,9 +442,12 @@ class PortfolioService:
         Returns:
             Summary dictionary with portfolio details
         """
-        try:
-            portfolio = self.get_portfolio(user_id, portfolio_name)
+        portfolio = self.get_portfolio(user_id, portfolio_name)
+        return self.summarize_portfolio(portfolio)
 
+    def summarize_portfolio(self, portfolio: Portfolio | None) -> PortfolioSummary:
+        """Summarize an already-loaded portfolio without querying the database again."""
+        try:
             if not portfolio:
                 return PortfolioSummary(
                     exists=False,
@@ -393,25 +458,16 @@ class PortfolioService:
                     error=None
                 )
 
-            # Group assets by type
-            by_type: dict[str, list[Asset]] = {}
-            for asset in portfolio.assets:
-                asset_type = asset.type
-                if asset_type not in by_type:
-                    by_type[asset_type] = []
-
-                by_type[asset_type].append(asset)
-
             summary = PortfolioSummary(
                 exists=True,
                 asset_count=len(portfolio.assets),
                 assets=portfolio.assets,
-                by_type=by_type,
+                by_type=portfolio.by_type,
                 last_updated=datetime.utcnow().isoformat(),
                 error=None
             )
 
-            logger.debug(f"Generated portfolio summary for user {user_id}")
+            logger.debug(f"Generated portfolio summary with {len(portfolio.assets)} assets")
             return summary
 
         except Exception as e:
@@ -427,54 +483,18 @@ class PortfolioService:
 
     def _prepare_asset_data(self, asset: Asset) -> tuple[str, str, float, dict]:
         """Convert Asset model to database fields."""
-
-        if isinstance(asset, Stock):
-            return asset.ticker, "stock", asset.shares, {"ticker": asset.ticker}
-        elif isinstance(asset, Crypto):
-            return asset.symbol, "crypto", asset.amount, {"symbol": asset.symbol}
-        elif isinstance(asset, RealEstate):
-            return asset.address, "real_estate", asset.market_value, {
-                "address": asset.address,
-                "market_value": asset.market_value
-            }
-        elif isinstance(asset, Mortgage):
-            return asset.lender, "mortgage", asset.balance, {
-                "lender": asset.lender,
-                "property_address": asset.property_address
-            }
-        elif isinstance(asset, Cash):
-            return asset.currency, "cash", asset.amount, {"currency": asset.currency}
-        else:
+        handler = _ASSET_DATA_HANDLERS.get(type(asset))
+        if handler is None:
             raise ValueError(f"Unknown asset type: {type(asset)}")
+        return handler(asset)
 
     def _db_asset_to_model(self, db_asset: DBAsset) -> Asset | None:
         try:
-            quantity = float(db_asset.quantity)
-            meta = db_asset.meta or {}
-
-            if db_asset.asset_type == "stock":
-                return Stock(ticker=db_asset.symbol, shares=quantity)
-            elif db_asset.asset_type == "crypto":
-                return Crypto(symbol=db_asset.symbol, amount=quantity)
-            elif db_asset.asset_type == "real_estate":
-                return RealEstate(
-                    address=db_asset.symbol,
-                    market_value=quantity
-                )
-            elif db_asset.asset_type == "mortgage":
-                return Mortgage(
-                    lender=db_asset.symbol,
-                    balance=quantity,
-                    property_address=meta.get("property_address")
-                )
-            elif db_asset.asset_type == "cash":
-                return Cash(
-                    currency=db_asset.symbol,
-                    amount=quantity
-                )
-            else:
+            builder = _DB_ASSET_BUILDERS.get(db_asset.asset_type)
+            if builder is None:
                 logger.warning(f"Unknown asset type in DB: {db_asset.asset_type}")
                 return None
+            return builder(db_asset.symbol, float(db_asset.quantity), db_asset.meta or {})
 
         except Exception as e:
             logger.error(f"Failed to convert DB asset to model: {e}")
@@ -482,40 +502,7 @@ class PortfolioService:
 
     def _asset_to_summary_dict(self, asset: Asset) -> dict[str, Any]:
         """Convert Asset model to summary dictionary."""
-        if isinstance(asset, Stock):
-            return {
-                "type": "stock",
-                "symbol": asset.ticker,
-                "quantity": asset.shares,
-                "display": f"{asset.ticker} ({asset.shares} shares)"
-            }
-        elif isinstance(asset, Crypto):
-            return {
-                "type": "crypto",
-                "symbol": asset.symbol,
-                "quantity": asset.amount,
-                "display": f"{asset.symbol} ({asset.amount})"
-            }
-        elif isinstance(asset, RealEstate):
-            return {
-                "type": "real_estate",
-                "address": asset.address,
-                "value": asset.market_value,
-                "display": f"Property: ${asset.market_value:,.0f}"
-            }
-        elif isinstance(asset, Mortgage):
-            return {
-                "type": "mortgage",
-                "lender": asset.lender,
-                "balance": asset.balance,
-                "display": f"Mortgage ({asset.lender}): ${asset.balance:,.0f}"
-            }
-        elif isinstance(asset, Cash):
-            return {
-                "type": "cash",
-                "currency": asset.currency,
-                "amount": asset.amount,
-                "display": f"Cash: {asset.currency} ${asset.amount:,.2f}"
-            }
-        else:
+        handler = _SUMMARY_HANDLERS.get(type(asset))
+        if handler is None:
             return {"type": "unknown", "display": str(asset)}
+        return handler(asset)
@@ -1,21 +1,39 @@
 # backend/app/agent/vector_store.py
 
+import hashlib
 import logging
 import os
+import threading
+import time
 import uuid
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, ClassVar, cast
 
+import numpy as np
 from langchain_huggingface import HuggingFaceEmbeddings
 from qdrant_client import QdrantClient
 from qdrant_client.http.models import (
     Condition,
+    Direction,
     Distance,
     FieldCondition,
     Filter,
     MatchAny,
     MatchValue,
+    OrderBy,
+    PayloadSchemaType,
     PointStruct,
+    QuantizationSearchParams,
     Range,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    ScoredPoint,
+    SearchParams,
+    SearchRequest,
     VectorParams,
 )
 
@@ -24,35 +42,223 @@ from ..utils import clean_value
 
 logger = logging.getLogger(__name__)
 
+# int8 scalar quantization for the growing collections: ~4x less vector memory;
+# searches scan the quantized vectors and rescore the oversampled top hits
+# against the original float32 ones.
+SQ8_CONFIG = ScalarQuantization(
+    scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+)
+SQ8_SEARCH_PARAMS = SearchParams(
+    quantization=QuantizationSearchParams(rescore=True, oversampling=2.0)
+)
+
+# Max points per upsert request
+UPSERT_BATCH_SIZE = 200
+
+
+class SemanticCache:
+    """Embedding-keyed cache for LLM results, backed by a Qdrant collection.
+
+    A lookup hits when a stored entry for the same ``asset_key`` younger than
+    ``ttl`` has cosine similarity of at least ``threshold`` with the query text:
+    the asset must match exactly, only the text is matched semantically. The
+    collection is created by VectorStoreService along with its ``payload_indexes``.
+    """
+
+    payload_indexes: ClassVar[dict[str, PayloadSchemaType]] = {
+        "asset_key": PayloadSchemaType.KEYWORD,
+        "stored_at": PayloadSchemaType.FLOAT,
+    }
+
+    def __init__(
+        self,
+        client: QdrantClient,
+        embed_query: Callable[[str], list[float]],
+        collection_name: str,
+        ttl: timedelta
+    ):
+        self.client = client
+        self.embed_query = embed_query
+        self.collection_name = collection_name
+        self.ttl = ttl
+
+    def get(self, asset_key: str, text: str, threshold: float = 0.92) -> dict[str, Any] | None:
+        try:
+            cutoff_ts = (datetime.now() - self.ttl).timestamp()
+            result = self.client.search(
+                collection_name=self.collection_name,
+                query_vector=self.embed_query(text),
+                limit=1,
+                score_threshold=threshold,
+                with_payload=["value"],
+                query_filter=Filter(must=[
+                    FieldCondition(key="asset_key", match=MatchValue(value=asset_key)),
+                    FieldCondition(key="stored_at", range=Range(gte=cutoff_ts))
+                ])
+            )
+            if not result:
+                return None
+            logger.debug(f"Semantic cache hit in {self.collection_name} (score {result[0].score:.3f})")
+            return (result[0].payload or {}).get("value")
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed: {e}")
+            return None
+
+    def put(self, asset_key: str, text: str, value: dict[str, Any]):
+        try:
+            point = PointStruct(
+                id=str(uuid.uuid4()),
+                vector=self.embed_query(text),
+                payload={
+                    "asset_key": asset_key,
+                    "text": text,
+                    "value": value,
+                    "stored_at": float(datetime.now().timestamp())
+                }
+            )
+            self.client.upsert(collection_name=self.collection_name, points=[point])
+        except Exception as e:
+            logger.warning(f"Semantic cache write failed: {e}")
+
+
+class QueryResultCache:
+    """Short-lived in-process cache of search results for near-duplicate queries.
+
+    Entries are grouped by search scope (filters and limit). A lookup returns the
+    results of the most similar past query in the same scope when cosine
+    similarity reaches ``threshold`` and the entry has not expired.
+    """
+
+    def __init__(self, threshold: float = 0.85, ttl_seconds: float = 300, max_entries: int = 500):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: dict[tuple, list[tuple[np.ndarray, list[dict], float]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, scope: tuple, vector: list[float]) -> list[dict] | None:
+        now = time.monotonic()
+        with self._lock:
+            entries = [e for e in self._entries.get(scope, []) if e[2] > now]
+            self._entries[scope] = entries
+            if not entries:
+                return None
+            scores = np.stack([e[0] for e in entries]) @ self._normalize(vector)
+            best = int(scores.argmax())
+            if scores[best] >= self.threshold:
+                return entries[best][1]
+        return None
+
+    def put(self, scope: tuple, vector: list[float], results: list[dict]):
+        with self._lock:
+            entries = self._entries.setdefault(scope, [])
+            entries.append((self._normalize(vector), results, time.monotonic() + self.ttl_seconds))
+            if len(entries) > self.max_entries:
+                del entries[0]
+
+    def _normalize(self, vector: list[float]) -> np.ndarray:
+        arr = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(arr)
+        return arr / norm if norm else arr
+
+
 class VectorStoreService:
+    # Loaded once per process; every store instance shares the same model and
+    # the same Qdrant client (and so its connection pool)
+    _shared_embeddings: ClassVar[HuggingFaceEmbeddings | None] = None
+    _shared_client: ClassVar[QdrantClient | None] = None
+
     def __init__(self):
         self.qdrant_host = os.getenv('QDRANT_HOST', 'localhost')
         self.qdrant_port = int(os.getenv('QDRANT_PORT', '6333'))
-        self.client = QdrantClient(
-            host=self.qdrant_host,
-            port=self.qdrant_port,
-        )
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2"
-        )
+        self.client = self._get_client(self.qdrant_host, self.qdrant_port)
+        self.embeddings = self._get_embeddings()
         self.news_collection_name = "portfolio_news"
         self.analysis_collection_name = "portfolio_analysis"
         self.vector_size = 384  # all-MiniLM-L6-v2
+        # Repeated queries within and across runs skip the embedding model; the
+        # semantic caches share it, so a miss followed by put embeds only once
+        self._embed_query = lru_cache(maxsize=1024)(self.embeddings.embed_query)
+        self._embed_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="embed")
+        # Writes nobody waits on; two workers keep Qdrant from being flooded
+        self._writer_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="vector-writer")
+        self._search_cache = QueryResultCache()
+
+        self.classification_cache = SemanticCache(
+            self.client, self._embed_query, "llm_classification_cache", ttl=timedelta(hours=24)
+        )
+        self.analysis_cache = SemanticCache(
+            self.client, self._embed_query, "llm_analysis_cache", ttl=timedelta(days=7)
+        )
 
         self._initialize_collections()
 
+    @classmethod
+    def _get_client(cls, host: str, port: int) -> QdrantClient:
+        if cls._shared_client is None:
+            cls._shared_client = QdrantClient(host=host, port=port)
+        return cls._shared_client
+
+    @classmethod
+    def _get_embeddings(cls) -> HuggingFaceEmbeddings:
+        if cls._shared_embeddings is None:
+            import torch  # installed with sentence-transformers
+
+            # Half precision on GPU; CPU inference stays in float32
+            model_kwargs = (
+                {"device": "cuda", "model_kwargs": {"torch_dtype": torch.float16}}
+                if torch.cuda.is_available() else {"device": "cpu"}
+            )
+            cls._shared_embeddings = HuggingFaceEmbeddings(
+                model_name="sentence-transformers/all-MiniLM-L6-v2",
+                model_kwargs=model_kwargs,
+                encode_kwargs={"batch_size": 128, "normalize_embeddings": True}
+            )
+        return cls._shared_embeddings
+
     def _initialize_collections(self):
+        # Index the filtered payload fields so Qdrant applies asset/date filters
+        # during the HNSW search instead of scanning candidates afterwards
+        collections = {
+            self.news_collection_name: {
+                "asset_key": PayloadSchemaType.KEYWORD,
+                "stored_at": PayloadSchemaType.FLOAT,
+            },
+            self.analysis_collection_name: {
+                "portfolio_hash": PayloadSchemaType.KEYWORD,
+                "stored_at": PayloadSchemaType.FLOAT,
+            },
+            self.classification_cache.collection_name: SemanticCache.payload_indexes,
+            self.analysis_cache.collection_name: SemanticCache.payload_indexes,
+        }
+        quantized = {self.news_collection_name, self.analysis_collection_name}
         try:
-            if not self.client.collection_exists(self.news_collection_name):
-                self.client.create_collection(
-                    collection_name=self.news_collection_name,
-                    vectors_config=VectorParams(size=self.vector_size, distance=Distance.COSINE)
-                )
-            if not self.client.collection_exists(self.analysis_collection_name):
-                self.client.create_collection(
-                    collection_name=self.analysis_collection_name,
-                    vectors_config=VectorParams(size=self.vector_size, distance=Distance.COSINE)
-                )
+            existing = {c.name for c in self.client.get_collections().collections}
+            for collection_name, fields in collections.items():
+                quantization_config = SQ8_CONFIG if collection_name in quantized else None
+                if collection_name in existing:
+                    info = self.client.get_collection(collection_name)
+                    indexed = info.payload_schema
+                    if quantization_config and info.config.quantization_config is None:
+                        self.client.update_collection(
+                            collection_name=collection_name,
+                            quantization_config=quantization_config
+                        )
+                else:
+                    self.client.create_collection(
+                        collection_name=collection_name,
+                        vectors_config=VectorParams(size=self.vector_size, distance=Distance.COSINE),
+                        quantization_config=quantization_config
+                    )
+                    indexed = {}
+
+                for field_name, field_schema in fields.items():
+                    if field_name not in indexed:
+                        self.client.create_payload_index(
+                            collection_name=collection_name,
+                            field_name=field_name,
+                            field_schema=field_schema
+                        )
             logger.info("Vector store collections initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize vector store: {e}")
@@ -60,38 +266,106 @@ class VectorStoreService:
 
     def store_news_items(self, news_items: list[NewsItem], asset_key: str):
         try:
-            documents = []
-            points = []
+            # Content-addressed ids: the same article for the same asset always maps
+            # to the same point, so re-ingested duplicates are never re-embedded
+            new_items: dict[str, tuple[NewsItem, str]] = {}
             for item in news_items:
                 doc_text = f"Title: {item.title}\nContent: {item.snippet}"
-                documents.append(doc_text)
+                new_items.setdefault(self._news_point_id(asset_key, doc_text), (item, doc_text))
+
+            stored_at = float(datetime.now().timestamp())
+            existing = [
+                point.id for point in self.client.retrieve(
+                    collection_name=self.news_collection_name,
+                    ids=list(new_items),
+                    with_payload=False,
+                    with_vectors=False
+                )
+            ]
+            if existing:
+                # Already embedded; just mark them as seen again so they stay in the search window
+                self.client.set_payload(
+                    collection_name=self.news_collection_name,
+                    payload={"stored_at": stored_at},
+                    points=existing
+                )
+                for point_id in existing:
+                    new_items.pop(str(point_id), None)
+
+            vectors = self._embed_documents([doc_text for _, doc_text in new_items.values()])
+            points = []
+            for (point_id, (item, _)), vector in zip(new_items.items(), vectors, strict=True):
+                # NewsItem fields are already typed, so build the payload directly
+                # instead of running every value through clean_value
                 metadata = {
                     "asset_key": asset_key,
                     "title": item.title,
+                    "snippet": item.snippet,
                     "url": item.url,
                     "source": item.source or "unknown",
                     "published_at": item.published_at.isoformat() if item.published_at else "",
-                    "sentiment": item.sentiment,
-                    "impact": item.impact,
+                    "sentiment": item.sentiment or "",
+                    "impact": item.impact or "",
                     "relevance_score": item.relevance_score or 0.0,
-                    "stored_at": float(datetime.now().timestamp())
+                    "stored_at": stored_at
                 }
-                metadata = {k: clean_value(v) for k, v in metadata.items()}
-                point_id = str(uuid.uuid4())
                 points.append(
                     PointStruct(
                         id=point_id,
-                        vector=self.embeddings.embed_query(doc_text),
+                        vector=vector,
                         payload=metadata
                     )
                 )
-            if points:
-                self.client.upsert(collection_name=self.news_collection_name, points=points)
-                logger.info(f"Stored {len(news_items)} news items for {asset_key}")
+            # Bounded request size for large ingests
+            for start in range(0, len(points), UPSERT_BATCH_SIZE):
+                self.client.upsert(
+                    collection_name=self.news_collection_name,
+                    points=points[start:start + UPSERT_BATCH_SIZE]
+                )
+            logger.info(f"Stored {len(points)} new news items for {asset_key} ({len(existing)} already stored)")
         except Exception as e:
             logger.error(f"Failed to store news items: {e}")
             raise
 
+    def submit_news_items(self, news_items: list[NewsItem], asset_key: str) -> Future:
+        """Store news items in the background; failures are logged, not raised."""
+        return self._submit_write(self.store_news_items, news_items, asset_key)
+
+    def submit_analysis_result(self, analysis_result: dict, portfolio_hash: str) -> Future:
+        return self._submit_write(self.store_analysis_result, analysis_result, portfolio_hash)
+
+    def _submit_write(self, fn: Callable[..., None], *args: Any) -> Future:
+        future = self._writer_pool.submit(fn, *args)
+        future.add_done_callback(self._log_write_failure)
+        return future
+
+    def _log_write_failure(self, future: Future):
+        if future.exception():
+            logger.error(f"Background vector store write failed: {future.exception()}")
+
+    def _news_point_id(self, asset_key: str, doc_text: str) -> str:
+        digest = hashlib.blake2b(f"{asset_key}|{doc_text}".encode(), digest_size=16).digest()
+        return str(uuid.UUID(bytes=digest))
+
+    def _embed_documents(self, documents: list[str], batch_size: int = 32) -> list[list[float]]:
+        """Embed documents in length-sorted mini-batches across the embedding pool.
+
+        Sorting by length keeps padding low inside each batch; vectors are
+        returned in the original document order.
+        """
+        order = sorted(range(len(documents)), key=lambda i: len(documents[i]))
+        batches = [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+        embedded = self._embed_pool.map(
+            self.embeddings.embed_documents,
+            [[documents[i] for i in batch] for batch in batches]
+        )
+
+        vectors: list[list[float]] = [[] for _ in documents]
+        for batch, batch_vectors in zip(batches, embedded, strict=True):
+            for index, vector in zip(batch, batch_vectors, strict=True):
+                vectors[index] = vector
+        return vectors
+
     def search_relevant_news(
         self,
         query: str,
@@ -100,41 +374,22 @@ class VectorStoreService:
         limit: int = 10
     ) -> list[dict]:
         try:
-            query_embedding = self.embeddings.embed_query(query)
-            cutoff_ts = (datetime.now() - timedelta(days=days_back)).timestamp()
-            filters = []
-
-            if asset_keys:
-                if len(asset_keys) == 1:
-                    filters.append(FieldCondition(
-                        key="asset_key",
-                        match=MatchValue(value=asset_keys[0])
-                    ))
-                else:
-                    filters.append(FieldCondition(
-                        key="asset_key",
-                        match=MatchAny(any=asset_keys)
-                    ))
-            filters.append(FieldCondition(
-                key="stored_at",
-                range=Range(gte=cutoff_ts)
-            ))
+            query_vector = self._embed_query(query)
+            scope = (tuple(sorted(asset_keys or [])), days_back, limit)
+            cached = self._search_cache.get(scope, query_vector)
+            if cached is not None:
+                logger.debug(f"Search cache hit for query: {query}")
+                return cached
 
             result = self.client.search(
                 collection_name=self.news_collection_name,
-                query_vector=query_embedding,
+                query_vector=query_vector,
                 limit=limit,
-                query_filter=Filter(must=filters)
+                query_filter=self._news_filter(asset_keys, days_back),
+                search_params=SQ8_SEARCH_PARAMS
             )
-            formatted_results = []
-            for point in result:
-                metadata = point.payload or {}
-                doc = f"Title: {metadata.get('title', '')}\nContent: {metadata.get('content', '')}"
-                formatted_results.append({
-                    "document": doc,
-                    "metadata": metadata,
-                    "relevance_score": point.score
-                })
+            formatted_results = self._format_news_hits(result)
+            self._search_cache.put(scope, query_vector, formatted_results)
             logger.info(f"Found {len(formatted_results)} relevant news items")
             return formatted_results
 
@@ -142,16 +397,94 @@ class VectorStoreService:
             logger.error(f"Failed to search news: {e}")
             return []
 
+    def search_many(
+        self,
+        queries: list[str],
+        asset_keys: list[str],
+        days_back: int = 7,
+        limit: int = 10
+    ) -> list[list[dict]]:
+        """Run one search per (query, asset_key) pair with a single embedding call and one Qdrant round trip."""
+        if not queries:
+            return []
+        try:
+            vectors = self.embeddings.embed_documents(queries)
+            scopes = [((asset_key,), days_back, limit) for asset_key in asset_keys]
+            results: list[list[dict] | None] = [
+                self._search_cache.get(scope, vector) for scope, vector in zip(scopes, vectors, strict=True)
+            ]
+
+            # Only queries without a near-duplicate cached result go to Qdrant
+            misses = [i for i, cached in enumerate(results) if cached is None]
+            if misses:
+                requests = [
+                    SearchRequest(
+                        vector=vectors[i],
+                        filter=self._news_filter([asset_keys[i]], days_back),
+                        limit=limit,
+                        params=SQ8_SEARCH_PARAMS,
+                        with_payload=True
+                    )
+                    for i in misses
+                ]
+                batch = self.client.search_batch(collection_name=self.news_collection_name, requests=requests)
+                for i, points in zip(misses, batch, strict=True):
+                    results[i] = self._format_news_hits(points)
+                    self._search_cache.put(scopes[i], vectors[i], results[i])
+
+            results = cast(list[list[dict]], results)
+            logger.info(f"Found {sum(len(r) for r in results)} relevant news items across {len(queries)} queries")
+            return results
+
+        except Exception as e:
+            logger.error(f"Failed to batch search news: {e}")
+            return [[] for _ in queries]
+
+    def _news_filter(self, asset_keys: list[str] | None, days_back: int) -> Filter:
+        cutoff_ts = (datetime.now() - timedelta(days=days_back)).timestamp()
+        filters = []
+
+        if asset_keys:
+            if len(asset_keys) == 1:
+                filters.append(FieldCondition(
+                    key="asset_key",
+                    match=MatchValue(value=asset_keys[0])
+                ))
+            else:
+                filters.append(FieldCondition(
+                    key="asset_key",
+                    match=MatchAny(any=asset_keys)
+                ))
+        filters.append(FieldCondition(
+            key="stored_at",
+            range=Range(gte=cutoff_ts)
+        ))
+        return Filter(must=filters)
+
+    def _format_news_hits(self, points: list[ScoredPoint]) -> list[dict]:
+        formatted_results = []
+        for point in points:
+            metadata = point.payload or {}
+            doc = f"Title: {metadata.get('title', '')}\nContent: {metadata.get('snippet', '')}"
+            formatted_results.append({
+                "document": doc,
+                "metadata": metadata,
+                "relevance_score": point.score
+            })
+        return formatted_results
+
     def store_analysis_result(self, analysis_result: dict, portfolio_hash: str):
         try:
             doc_text = (
                 f"Analysis: {analysis_result.get('summary', '')}\n"
                 f"Recommendations: {', '.join(analysis_result.get('recommendations', []))}"
             )
+            now = datetime.now()
             metadata = {
                 "portfolio_hash": portfolio_hash,
                 "analysis_type": analysis_result.get('type', 'general'),
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": now.isoformat(),
+                "stored_at": float(now.timestamp()),
                 "risk_level": analysis_result.get('risk_level'),
                 "confidence": analysis_result.get('confidence', 0.0)
             }
@@ -167,7 +500,7 @@ class VectorStoreService:
         except Exception as e:
             logger.error(f"Failed to store analysis result: {e}")
 
-    def get_portfolio_history(self, portfolio_hash: str, days_back: int = 30) -> list[dict]:
+    def get_portfolio_history(self, portfolio_hash: str, days_back: int = 30, limit: int = 20) -> list[dict]:
         try:
             cutoff_ts = (datetime.now() - timedelta(days=days_back)).timestamp()
             filters: list[Condition] = [
@@ -175,20 +508,21 @@ class VectorStoreService:
                     key="portfolio_hash",
                     match=MatchValue(value=portfolio_hash)
                 ),
+                # Range filters need a numeric field; "timestamp" is an ISO string
                 FieldCondition(
-                    key="timestamp",
+                    key="stored_at",
                     range=Range(gte=cutoff_ts)
                 )
             ]
+            # Newest first straight from Qdrant (uses the stored_at range index)
             result = self.client.scroll(
                 collection_name=self.analysis_collection_name,
-                limit=50,
-                filter=Filter(must=filters)
+                limit=limit,
+                scroll_filter=Filter(must=filters),
+                with_vectors=False,
+                order_by=OrderBy(key="stored_at", direction=Direction.DESC)
             )
-            history = []
-            for point in result[0]:
-                history.append(point.payload)
-            return sorted(history, key=lambda x: x['timestamp'], reverse=True)
+            return [point.payload or {} for point in result[0]]
         except Exception as e:
             logger.error(f"Failed to get portfolio history: {e}")
             return []
@@ -1,15 +1,16 @@
 # backend/app/agent/session_storage.py
 
-import json
 import logging
 import os
 from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
+from functools import lru_cache
 
 import redis
 from redis.exceptions import ConnectionError as RedisConnectionError
 
-from ..models import ChatSession
+from ..models import ChatMessage, ChatSession
+from ..models.chat import MAX_SESSION_MESSAGES
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +38,10 @@ class SessionStorage(ABC):
     def cleanup_expired(self) -> int:
         pass
 
+    def append_messages(self, session_id: str, session: ChatSession, new_messages: list[ChatMessage]) -> None:
+        """Persist a turn. Backends that can write only the new messages override this."""
+        self.set(session_id, session)
+
 
 class InMemorySessionStorage(SessionStorage):
     """Simple in-memory storage for development"""
@@ -82,6 +87,7 @@ class RedisSessionStorage(SessionStorage):
         self.redis_url = redis_url or os.getenv('REDIS_URL')
         self.ttl = ttl_minutes * 60
         self.key_prefix = "chat_session:"
+        self.messages_key_prefix = "chat_session_messages:"
 
         if not self.redis_url:
             raise RedisConnectionError("Redis URL not provided")
@@ -96,14 +102,21 @@ class RedisSessionStorage(SessionStorage):
 
     def get(self, session_id: str) -> ChatSession | None:
         try:
-            key = f"{self.key_prefix}{session_id}"
-            data = self.client.get(key)
+            pipe = self.client.pipeline(transaction=False)
+            pipe.get(f"{self.key_prefix}{session_id}")
+            pipe.lrange(f"{self.messages_key_prefix}{session_id}", 0, -1)
+            data, raw_messages = pipe.execute()
 
             if not data:
                 return None
 
-            session_dict = json.loads(data) # type: ignore
-            return ChatSession(**session_dict)
+            session = ChatSession.model_validate_json(data) # type: ignore
+            if raw_messages:
+                session.messages = [ChatMessage.model_validate_json(m) for m in raw_messages]
+            elif session.messages:
+                # Written before messages moved to their own list; migrate so appends keep history
+                self.set(session_id, session)
+            return session
 
         except Exception as e:
             logger.error(f"Failed to get session {session_id}: {e}")
@@ -111,36 +124,45 @@ class RedisSessionStorage(SessionStorage):
 
     def set(self, session_id: str, session: ChatSession) -> None:
         try:
-            key = f"{self.key_prefix}{session_id}"
-
-            # Convert session to JSON-serializable dict
-            session_dict = session.model_dump()
+            messages_key = f"{self.messages_key_prefix}{session_id}"
+            pipe = self.client.pipeline()
+            self._queue_session_fields(pipe, session_id, session)
+            pipe.delete(messages_key)
+            if session.messages:
+                pipe.rpush(messages_key, *(m.model_dump_json() for m in session.messages))
+                pipe.expire(messages_key, self.ttl)
+            pipe.execute()
 
-            # Handle datetime serialization
-            for field in ['created_at', 'last_activity']:
-                if field in session_dict:
-                    session_dict[field] = session_dict[field].isoformat()
-
-            # Handle messages
-            for msg in session_dict.get('messages', []):
-                if 'timestamp' in msg:
-                    msg['timestamp'] = msg['timestamp'].isoformat()
+        except Exception as e:
+            logger.error(f"Failed to set session {session_id}: {e}")
+            raise
 
-            # Store with TTL
-            self.client.setex(
-                key,
-                self.ttl,
-                json.dumps(session_dict)
-            )
+    def append_messages(self, session_id: str, session: ChatSession, new_messages: list[ChatMessage]) -> None:
+        # Only the small session fields and the new messages are written, not the whole history
+        try:
+            messages_key = f"{self.messages_key_prefix}{session_id}"
+            pipe = self.client.pipeline()
+            self._queue_session_fields(pipe, session_id, session)
+            if new_messages:
+                pipe.rpush(messages_key, *(m.model_dump_json() for m in new_messages))
+                pipe.ltrim(messages_key, -MAX_SESSION_MESSAGES, -1)
+            pipe.expire(messages_key, self.ttl)
+            pipe.execute()
 
         except Exception as e:
-            logger.error(f"Failed to set session {session_id}: {e}")
+            logger.error(f"Failed to append to session {session_id}: {e}")
             raise
 
+    def _queue_session_fields(self, pipe, session_id: str, session: ChatSession) -> None:
+        pipe.setex(
+            f"{self.key_prefix}{session_id}",
+            self.ttl,
+            session.model_dump_json(exclude={"messages"})
+        )
+
     def delete(self, session_id: str) -> None:
         try:
-            key = f"{self.key_prefix}{session_id}"
-            self.client.delete(key)
+            self.client.delete(f"{self.key_prefix}{session_id}", f"{self.messages_key_prefix}{session_id}")
         except Exception as e:
             logger.error(f"Failed to delete session {session_id}: {e}")
 
@@ -197,6 +219,9 @@ class HybridSessionStorage(SessionStorage):
     def cleanup_expired(self) -> int:
         return self.storage.cleanup_expired()
 
+    def append_messages(self, session_id: str, session: ChatSession, new_messages: list[ChatMessage]) -> None:
+        self.storage.append_messages(session_id, session, new_messages)
+
 
 # Factory function
 def get_session_storage() -> SessionStorage:
@@ -207,3 +232,18 @@ def get_session_storage() -> SessionStorage:
         return RedisSessionStorage()
     else:
         return HybridSessionStorage()
+
+
+@lru_cache(maxsize=1)
+def get_redis_client() -> redis.Redis | None:
+    """Process-wide Redis client for shared caches, or None when Redis is not configured or reachable."""
+    redis_url = os.getenv('REDIS_URL')
+    if not redis_url:
+        return None
+    try:
+        client = redis.from_url(redis_url, decode_responses=True)
+        client.ping()
+        return client
+    except Exception as e:
+        logger.warning(f"Redis not available for shared caches: {e}")
+        return None
@@ -1,10 +1,14 @@
 # backend/app/agent/tools.py
 
+import asyncio
 import logging
 import os
+import re
+from collections.abc import Callable
 from datetime import datetime, timedelta
-from typing import cast
+from typing import Any, cast
 
+import httpx
 import requests
 from langchain.schema import BaseMessage, HumanMessage, SystemMessage
 from langchain_openai import AzureChatOpenAI
@@ -14,14 +18,101 @@ from ..config.prompts import prompt_manager
 from ..models import (
     AnalysisResult,
     AssetAnalysisResponse,
+    NewsBatchClassificationResponse,
     NewsClassificationResponse,
     NewsItem,
     PortfolioDigestResponse,
 )
-from ..models.assets import Asset
+from ..models.assets import Asset, Cash, Crypto, Mortgage, RealEstate, Stock
+from .services.vector_store import SemanticCache
 
 logger = logging.getLogger(__name__)
 
+# Built once; a single case-insensitive scan per risk assessment
+HIGH_RISK_RE = re.compile(r"high risk|significant risk|warning|concern", re.IGNORECASE)
+
+# Static digest instructions, built once and shared by every call
+DIGEST_SYSTEM_MESSAGE = SystemMessage(content=(
+    "You are a senior portfolio manager providing a comprehensive portfolio digest.\n\n"
+    "Synthesize the individual asset analyses into the structured response format.\n"
+    "Be concise but actionable. Focus on portfolio-level insights, not individual assets."
+))
+
+
+def _real_estate_query(asset: RealEstate) -> str:
+    # Extract city/region from address for broader news
+    address_parts = asset.address.split(',')
+    location = address_parts[-2].strip() if len(address_parts) > 1 else asset.address
+    return f"{location} real estate market housing prices"
+
+
+# Keyed by concrete asset class: one dict lookup per asset instead of a type comparison chain
+_NEWS_QUERY_BUILDERS: dict[type, Callable[[Any], str]] = {
+    Stock: lambda a: f"{a.ticker} stock earnings financial news",
+    Crypto: lambda a: f"{a.symbol} cryptocurrency bitcoin price news",
+    RealEstate: _real_estate_query,
+    Mortgage: lambda a: f"mortgage rates housing market {a.lender}",
+    Cash: lambda a: f"{a.currency} currency exchange rates inflation",
+}
+
+_ASSET_INFO_FORMATTERS: dict[type, Callable[[Any], str]] = {
+    Stock: lambda a: f"Stock: {a.ticker} ({a.shares} shares)",
+    Crypto: lambda a: f"Cryptocurrency: {a.symbol} ({a.amount} units)",
+    RealEstate: lambda a: f"Real Estate: {a.address} (${a.market_value:,.2f})",
+    Mortgage: lambda a: f"Mortgage: {a.lender} (${a.balance:,.2f} balance)",
+    Cash: lambda a: f"Cash: {a.currency} (${a.amount:,.2f})",
+}
+
+# One pooled client for all news API calls so concurrent asset searches reuse
+# connections (and multiplex over HTTP/2) instead of handshaking per request.
+_http_client: httpx.AsyncClient | None = None
+_llm_http_client: httpx.AsyncClient | None = None
+_llm_sync_http_client: httpx.Client | None = None
+
+LLM_HTTP_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+LLM_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=100)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=32)
+        )
+    return _http_client
+
+
+def get_llm_http_client() -> httpx.AsyncClient:
+    # Shared by every AzureChatOpenAI instance: concurrent calls from all users
+    # multiplex over a small pool of warm HTTP/2 connections to the same endpoint
+    global _llm_http_client
+    if _llm_http_client is None or _llm_http_client.is_closed:
+        _llm_http_client = httpx.AsyncClient(http2=True, timeout=LLM_HTTP_TIMEOUT, limits=LLM_HTTP_LIMITS)
+    return _llm_http_client
+
+
+def get_llm_sync_http_client() -> httpx.Client:
+    # Same pooling for the synchronous invoke() paths, which otherwise get a client per instance
+    global _llm_sync_http_client
+    if _llm_sync_http_client is None or _llm_sync_http_client.is_closed:
+        _llm_sync_http_client = httpx.Client(http2=True, timeout=LLM_HTTP_TIMEOUT, limits=LLM_HTTP_LIMITS)
+    return _llm_sync_http_client
+
+
+async def close_http_client():
+    global _http_client, _llm_http_client, _llm_sync_http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+    if _llm_http_client is not None:
+        await _llm_http_client.aclose()
+        _llm_http_client = None
+    if _llm_sync_http_client is not None:
+        _llm_sync_http_client.close()
+        _llm_sync_http_client = None
+
 class NewsSearchTool:
     def __init__(self):
         self.newsapi_key = os.getenv('NEWS_SEARCH_API_KEY')
@@ -31,34 +122,25 @@ class NewsSearchTool:
 
     def search_newsapi(self, query: str, days_back: int = 7, page_size: int = 10) -> list[NewsItem]:
         try:
-            from_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')
-
-            params = {
-                'q': query,
-                'from': from_date,
-                'sortBy': 'relevancy',
-                'pageSize': page_size,
-                'language': 'en',
-                'apiKey': self.newsapi_key
-            }
-
-            response = requests.get(self.newsapi_endpoint, params=params)
+            response = requests.get(self.newsapi_endpoint, params=self._newsapi_params(query, days_back, page_size))
             response.raise_for_status()
 
-            data = response.json()
-            news_items = []
+            news_items = self._parse_newsapi_articles(response.json())
+            logger.info(f"Found {len(news_items)} articles for query: {query}")
+            return news_items
 
-            for article in data.get('articles', []):
-                if article.get('title') and article.get('description'):
-                    news_item = NewsItem(
-                        title=article['title'],
-                        snippet=article['description'],
-                        url=article['url'],
-                        published_at=datetime.fromisoformat(article['publishedAt'].replace('Z', '+00:00')) if article.get('publishedAt') else None,
-                        source=article.get('source', {}).get('name', 'NewsAPI')
-                    )
-                    news_items.append(news_item)
+        except Exception as e:
+            logger.error(f"NewsAPI search failed: {e}")
+            return []
+
+    async def asearch_newsapi(self, query: str, days_back: int = 7, page_size: int = 10) -> list[NewsItem]:
+        try:
+            response = await get_http_client().get(
+                self.newsapi_endpoint, params=self._newsapi_params(query, days_back, page_size)
+            )
+            response.raise_for_status()
 
+            news_items = self._parse_newsapi_articles(response.json())
             logger.info(f"Found {len(news_items)} articles for query: {query}")
             return news_items
 
@@ -72,33 +154,29 @@ class NewsSearchTool:
                 logger.warning("Bing subscription key not found, skipping Bing search")
                 return []
 
-            headers = {
-                'Ocp-Apim-Subscription-Key': self.bing_subscription_key
-            }
+            response = requests.get(self.bing_endpoint, headers=self._bing_headers(), params=self._bing_params(query, count))
+            response.raise_for_status()
 
-            params = {
-                'q': query,
-                'count': count,
-                'mkt': 'en-US',
-                'freshness': 'Week'
-            }
+            news_items = self._parse_bing_articles(response.json())
+            logger.info(f"Found {len(news_items)} articles from Bing for query: {query}")
+            return news_items
 
-            response = requests.get(self.bing_endpoint, headers=headers, params=params)
-            response.raise_for_status()
+        except Exception as e:
+            logger.error(f"Bing search failed: {e}")
+            return []
 
-            data = response.json()
-            news_items = []
+    async def asearch_bing(self, query: str, count: int = 10) -> list[NewsItem]:
+        try:
+            if not self.bing_subscription_key:
+                logger.warning("Bing subscription key not found, skipping Bing search")
+                return []
 
-            for article in data.get('value', []):
-                news_item = NewsItem(
-                    title=article['name'],
-                    snippet=article['description'],
-                    url=article['url'],
-                    published_at=datetime.fromisoformat(article['datePublished'].replace('Z', '+00:00')) if article.get('datePublished') else None,
-                    source='Bing News'
-                )
-                news_items.append(news_item)
+            response = await get_http_client().get(
+                self.bing_endpoint, headers=self._bing_headers(), params=self._bing_params(query, count)
+            )
+            response.raise_for_status()
 
+            news_items = self._parse_bing_articles(response.json())
             logger.info(f"Found {len(news_items)} articles from Bing for query: {query}")
             return news_items
 
@@ -106,6 +184,57 @@ class NewsSearchTool:
             logger.error(f"Bing search failed: {e}")
             return []
 
+    def _newsapi_params(self, query: str, days_back: int, page_size: int) -> dict:
+        from_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')
+        return {
+            'q': query,
+            'from': from_date,
+            'sortBy': 'relevancy',
+            'pageSize': page_size,
+            'language': 'en',
+            'apiKey': self.newsapi_key
+        }
+
+    def _bing_headers(self) -> dict:
+        return {
+            'Ocp-Apim-Subscription-Key': self.bing_subscription_key
+        }
+
+    def _bing_params(self, query: str, count: int) -> dict:
+        return {
+            'q': query,
+            'count': count,
+            'mkt': 'en-US',
+            'freshness': 'Week'
+        }
+
+    def _parse_newsapi_articles(self, data: dict) -> list[NewsItem]:
+        news_items = []
+        for article in data.get('articles', []):
+            if article.get('title') and article.get('description'):
+                news_item = NewsItem(
+                    title=article['title'],
+                    snippet=article['description'],
+                    url=article['url'],
+                    published_at=datetime.fromisoformat(article['publishedAt'].replace('Z', '+00:00')) if article.get('publishedAt') else None,
+                    source=article.get('source', {}).get('name', 'NewsAPI')
+                )
+                news_items.append(news_item)
+        return news_items
+
+    def _parse_bing_articles(self, data: dict) -> list[NewsItem]:
+        news_items = []
+        for article in data.get('value', []):
+            news_item = NewsItem(
+                title=article['name'],
+                snippet=article['description'],
+                url=article['url'],
+                published_at=datetime.fromisoformat(article['datePublished'].replace('Z', '+00:00')) if article.get('datePublished') else None,
+                source='Bing News'
+            )
+            news_items.append(news_item)
+        return news_items
+
     def search_for_asset(self, asset: Asset, use_bing: bool = False) -> list[NewsItem]:
         query = self._build_asset_query(asset)
 
@@ -114,146 +243,293 @@ class NewsSearchTool:
         else:
             return self.search_newsapi(query)
 
-    def _build_asset_query(self, asset: Asset) -> str:
-        if asset.type == "stock":
-            return f"{asset.ticker} stock earnings financial news"
-        elif asset.type == "crypto":
-            return f"{asset.symbol} cryptocurrency bitcoin price news"
-        elif asset.type == "real_estate":
-            # Extract city/region from address for broader news
-            address_parts = asset.address.split(',')
-            location = address_parts[-2].strip() if len(address_parts) > 1 else asset.address
-            return f"{location} real estate market housing prices"
-        elif asset.type == "mortgage":
-            return f"mortgage rates housing market {asset.lender}"
-        elif asset.type == "cash":
-            return f"{asset.currency} currency exchange rates inflation"
+    async def asearch_for_asset(self, asset: Asset, use_bing: bool = False) -> list[NewsItem]:
+        query = self._build_asset_query(asset)
+
+        if use_bing:
+            return await self.asearch_bing(query)
         else:
+            return await self.asearch_newsapi(query)
+
+    def _build_asset_query(self, asset: Asset) -> str:
+        builder = _NEWS_QUERY_BUILDERS.get(type(asset))
+        if builder is None:
             return f"{asset.type} financial market news"
+        return builder(asset)
 
 class ClassificationTool:
-    def __init__(self):
+    def __init__(self, max_concurrency: int = 8, cache: SemanticCache | None = None):
         self.llm = AzureChatOpenAI(
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT" or ""),
+            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT", ""),
             azure_deployment="gpt-4o-mini",
             api_key=SecretStr(os.getenv('AZURE_OPENAI_API_KEY') or ""),
             api_version="2025-01-01-preview",
-            temperature=0.1
+            temperature=0.1,
+            http_client=get_llm_sync_http_client(),
+            http_async_client=get_llm_http_client()
         )
+        self.max_concurrency = max_concurrency
+        self.cache = cache
 
 
     def classify_news_item(self, news_item: NewsItem, asset: Asset) -> NewsItem:
-        try:
-            asset_info = f"{asset.type}: {getattr(asset, 'ticker', '') or getattr(asset, 'symbol', '') or str(asset)}"
+        cached = self._get_cached_classification(news_item, asset)
+        if cached:
+            return self._apply_classification(news_item, cached)
 
-            # Prepare user content for news classification
-            user_content = f"Asset: {asset_info}\nNews Title: {news_item.title}\nNews Content: {news_item.snippet}"
+        try:
+            messages = self._build_classification_messages(news_item, asset)
+            response = cast(NewsClassificationResponse, self.llm.with_structured_output(NewsClassificationResponse).invoke(messages))
+            self._put_cached_classification(news_item, asset, response)
+            return self._apply_classification(news_item, response)
 
-            # Use prompt manager to build messages with Langfuse prompt
-            messages = prompt_manager.build_messages(
-                system_prompt_name="tools-news-classifier",
-                user_content=user_content
-            )
+        except Exception as e:
+            logger.error(f"Classification failed: {e}")
+            return self._apply_default_classification(news_item)
 
-            response = cast(NewsClassificationResponse, self.llm.with_structured_output(NewsClassificationResponse).invoke(messages))
+    async def aclassify_news_item(self, news_item: NewsItem, asset: Asset) -> NewsItem:
+        cached = await asyncio.to_thread(self._get_cached_classification, news_item, asset)
+        if cached:
+            return self._apply_classification(news_item, cached)
 
-            news_item.sentiment = response.sentiment
-            news_item.impact = response.impact
-            news_item.relevance_score = response.relevance_score
-            logger.debug(f"Classified news: {news_item.title[:50]}... - {response.sentiment}/{response.impact}/{response.relevance_score}")
-            return news_item
+        try:
+            messages = self._build_classification_messages(news_item, asset)
+            response = cast(NewsClassificationResponse, await self.llm.with_structured_output(NewsClassificationResponse).ainvoke(messages))
+            await asyncio.to_thread(self._put_cached_classification, news_item, asset, response)
+            return self._apply_classification(news_item, response)
 
         except Exception as e:
             logger.error(f"Classification failed: {e}")
-            news_item.sentiment = "neutral"
-            news_item.impact = "low"
-            news_item.relevance_score = 0.5
-            return news_item
+            return self._apply_default_classification(news_item)
+
+    async def aclassify_batch(self, items: list[tuple[NewsItem, Asset]], batch_size: int = 16) -> list[NewsItem]:
+        """Classify many news items with one LLM call per batch of same-asset items.
+
+        Results are returned in the same order as ``items``. A batch whose
+        response cannot be matched back to its items is re-classified item by item.
+        Items found in the semantic cache never reach the LLM.
+        """
+        results: list[NewsItem | None] = [None] * len(items)
+        cached = await asyncio.gather(
+            *(asyncio.to_thread(self._get_cached_classification, news_item, asset) for news_item, asset in items)
+        )
+
+        batches: dict[str, list[int]] = {}
+        for index, ((news_item, asset), hit) in enumerate(zip(items, cached, strict=True)):
+            if hit:
+                results[index] = self._apply_classification(news_item, hit)
+            else:
+                # Grouped by the exact asset, so one prompt never mixes two assets with the same label
+                batches.setdefault(asset.key, []).append(index)
+
+        chunks = [
+            indices[start:start + batch_size]
+            for indices in batches.values()
+            for start in range(0, len(indices), batch_size)
+        ]
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def _run(chunk: list[int]):
+            async with semaphore:
+                classified = await self._aclassify_chunk([items[i] for i in chunk])
+            for index, news_item in zip(chunk, classified, strict=True):
+                results[index] = news_item
+
+        await asyncio.gather(*(_run(chunk) for chunk in chunks))
+        logger.info(f"Batch classified {len(items)} news items in {len(chunks)} LLM calls")
+        return cast(list[NewsItem], results)
+
+    async def _aclassify_chunk(self, chunk: list[tuple[NewsItem, Asset]]) -> list[NewsItem]:
+        asset = chunk[0][1]
+        articles = "\n\n".join(
+            f"{i}. News Title: {news_item.title}\n   News Content: {news_item.snippet}"
+            for i, (news_item, _) in enumerate(chunk, 1)
+        )
+        messages = prompt_manager.build_messages(
+            system_prompt_name="tools-news-batch-classifier",
+            user_content=f"Asset: {self._asset_label(asset)}\n\nNews Articles:\n{articles}"
+        )
+
+        try:
+            response = cast(
+                NewsBatchClassificationResponse,
+                await self.llm.with_structured_output(NewsBatchClassificationResponse).ainvoke(messages)
+            )
+            if len(response.classifications) == len(chunk):
+                pairs = list(zip(chunk, response.classifications, strict=True))
+                # Cache writes run concurrently, each under the item's own asset
+                await asyncio.gather(*(
+                    asyncio.to_thread(self._put_cached_classification, news_item, item_asset, classification)
+                    for (news_item, item_asset), classification in pairs
+                ))
+                return [
+                    self._apply_classification(news_item, classification)
+                    for (news_item, _), classification in pairs
+                ]
+            logger.warning(
+                f"Batch classification returned {len(response.classifications)} results for {len(chunk)} items, "
+                "falling back to per-item classification"
+            )
+        except Exception as e:
+            logger.error(f"Batch classification failed, falling back to per-item classification: {e}")
+
+        return list(await asyncio.gather(*(self.aclassify_news_item(news_item, a) for news_item, a in chunk)))
+
+    def _cache_text(self, news_item: NewsItem) -> str:
+        return f"{news_item.title}\n{news_item.snippet}"
+
+    def _get_cached_classification(self, news_item: NewsItem, asset: Asset) -> NewsClassificationResponse | None:
+        if not self.cache:
+            return None
+        # Relevance is judged against the asset, so the same article is cached per asset
+        cached = self.cache.get(asset.key, self._cache_text(news_item))
+        return NewsClassificationResponse.model_validate(cached) if cached else None
+
+    def _put_cached_classification(self, news_item: NewsItem, asset: Asset, response: NewsClassificationResponse):
+        if self.cache:
+            self.cache.put(asset.key, self._cache_text(news_item), response.model_dump())
+
+    def _asset_label(self, asset: Asset) -> str:
+        return f"{asset.type}: {getattr(asset, 'ticker', '') or getattr(asset, 'symbol', '') or str(asset)}"
+
+    def _build_classification_messages(self, news_item: NewsItem, asset: Asset) -> list[BaseMessage]:
+        asset_info = self._asset_label(asset)
+
+        # Prepare user content for news classification
+        user_content = f"Asset: {asset_info}\nNews Title: {news_item.title}\nNews Content: {news_item.snippet}"
+
+        # Use prompt manager to build messages with Langfuse prompt
+        return prompt_manager.build_messages(
+            system_prompt_name="tools-news-classifier",
+            user_content=user_content
+        )
+
+    def _apply_classification(self, news_item: NewsItem, response: NewsClassificationResponse) -> NewsItem:
+        logger.debug(f"Classified news: {news_item.title[:50]}... - {response.sentiment}/{response.impact}/{response.relevance_score}")
+        return news_item.model_copy(update={
+            "sentiment": response.sentiment,
+            "impact": response.impact,
+            "relevance_score": response.relevance_score
+        })
+
+    def _apply_default_classification(self, news_item: NewsItem) -> NewsItem:
+        return news_item.model_copy(update={"sentiment": "neutral", "impact": "low", "relevance_score": 0.5})
 
 class AnalysisTool:
-    def __init__(self):
+    def __init__(self, cache: SemanticCache | None = None):
         self.llm = AzureChatOpenAI(
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT" or ""),
+            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT", ""),
             azure_deployment="gpt-4o-mini",
             api_key=SecretStr(os.getenv('AZURE_OPENAI_API_KEY') or ""),
             api_version="2025-01-01-preview",
-            temperature=0.3
+            temperature=0.3,
+            http_client=get_llm_sync_http_client(),
+            http_async_client=get_llm_http_client()
         )
+        self.cache = cache
 
 
     def analyze_asset(self, asset: Asset, classified_news: list[NewsItem]) -> AnalysisResult:
         try:
             asset_key = self._get_asset_key(asset)
 
-            news_summary = self._prepare_news_summary(classified_news)
-            asset_info = self._get_asset_info(asset)
+            cache_text = self._cache_text(classified_news)
+            cached = self.cache.get(asset_key, cache_text) if self.cache else None
+            if cached:
+                logger.info(f"Using cached analysis for {asset_key}")
+                return self._build_result(asset, asset_key, classified_news, AssetAnalysisResponse.model_validate(cached))
 
-            # Prepare user content for asset analysis
-            user_content = f"""Asset: {asset_info}
-                Recent News Analysis:
-                {news_summary}"""
+            messages = self._build_analysis_messages(asset, classified_news)
+            response = cast(AssetAnalysisResponse, self.llm.with_structured_output(AssetAnalysisResponse).invoke(messages))
+            if self.cache:
+                self.cache.put(asset_key, cache_text, response.model_dump())
 
-            # Use prompt manager to build messages with Langfuse prompt
-            messages = prompt_manager.build_messages(
-                system_prompt_name="tools-asset-analyzer",
-                user_content=user_content
-            )
+            logger.info(f"Analysis completed for {asset_key} - Confidence: {response.confidence_score}")
+            return self._build_result(asset, asset_key, classified_news, response)
 
-            response = cast(AssetAnalysisResponse, self.llm.with_structured_output(AssetAnalysisResponse).invoke(messages))
+        except Exception as e:
+            logger.error(f"Analysis failed for {asset}: {e}")
+            return self._default_result(asset, classified_news)
 
-            result = AnalysisResult(
-                asset_key=asset_key,
-                asset=asset,
-                news_items=classified_news,
-                sentiment_summary=response.sentiment_summary,
-                risk_assessment=response.risk_assessment,
-                recommendations=response.recommendations,
-                confidence_score=response.confidence_score
-            )
+    async def aanalyze_asset(self, asset: Asset, classified_news: list[NewsItem]) -> AnalysisResult:
+        try:
+            asset_key = self._get_asset_key(asset)
+
+            cache_text = self._cache_text(classified_news)
+            cached = await asyncio.to_thread(self.cache.get, asset_key, cache_text) if self.cache else None
+            if cached:
+                logger.info(f"Using cached analysis for {asset_key}")
+                return self._build_result(asset, asset_key, classified_news, AssetAnalysisResponse.model_validate(cached))
+
+            messages = self._build_analysis_messages(asset, classified_news)
+            response = cast(AssetAnalysisResponse, await self.llm.with_structured_output(AssetAnalysisResponse).ainvoke(messages))
+            if self.cache:
+                await asyncio.to_thread(self.cache.put, asset_key, cache_text, response.model_dump())
 
             logger.info(f"Analysis completed for {asset_key} - Confidence: {response.confidence_score}")
-            return result
+            return self._build_result(asset, asset_key, classified_news, response)
 
         except Exception as e:
             logger.error(f"Analysis failed for {asset}: {e}")
-            # Return default analysis
-            return AnalysisResult(
-                asset_key=self._get_asset_key(asset),
-                asset=asset,
-                news_items=classified_news,
-                sentiment_summary="Insufficient data for analysis.",
-                risk_assessment="Unable to assess risk due to limited information.",
-                recommendations=["Monitor for more news updates"],
-                confidence_score=0.1
-            )
+            return self._default_result(asset, classified_news)
+
+    def _cache_text(self, classified_news: list[NewsItem]) -> str:
+        # Canonical text for the set of headlines; the asset is matched exactly by the cache
+        return '|'.join(sorted(n.title for n in classified_news))
+
+    def _build_analysis_messages(self, asset: Asset, classified_news: list[NewsItem]) -> list[BaseMessage]:
+        news_summary = self._prepare_news_summary(classified_news)
+        asset_info = self._get_asset_info(asset)
+
+        # Prepare user content for asset analysis
+        user_content = f"""Asset: {asset_info}
+            Recent News Analysis:
+            {news_summary}"""
+
+        # Use prompt manager to build messages with Langfuse prompt
+        return prompt_manager.build_messages(
+            system_prompt_name="tools-asset-analyzer",
+            user_content=user_content
+        )
+
+    def _default_result(self, asset: Asset, classified_news: list[NewsItem]) -> AnalysisResult:
+        return AnalysisResult.model_construct(
+            asset_key=self._get_asset_key(asset),
+            asset=asset,
+            news_items=classified_news,
+            sentiment_summary="Insufficient data for analysis.",
+            risk_assessment="Unable to assess risk due to limited information.",
+            recommendations=["Monitor for more news updates"],
+            confidence_score=0.1
+        )
+
+    def _build_result(
+        self,
+        asset: Asset,
+        asset_key: str,
+        classified_news: list[NewsItem],
+        response: AssetAnalysisResponse
+    ) -> AnalysisResult:
+        # Inputs are already validated models, so skip re-validating the nested news list
+        return AnalysisResult.model_construct(
+            asset_key=asset_key,
+            asset=asset,
+            news_items=classified_news,
+            sentiment_summary=response.sentiment_summary,
+            risk_assessment=response.risk_assessment,
+            recommendations=response.recommendations,
+            confidence_score=response.confidence_score
+        )
 
     def _get_asset_key(self, asset: Asset) -> str:
-        if asset.type == "stock":
-            return f"stock:{asset.ticker}"
-        elif asset.type == "crypto":
-            return f"crypto:{asset.symbol}"
-        elif asset.type == "real_estate":
-            return f"real_estate:{asset.address}"
-        elif asset.type == "mortgage":
-            return f"mortgage:{asset.lender}"
-        elif asset.type == "cash":
-            return f"cash:{asset.currency}"
-        else:
-            return f"unknown:{str(asset)}"
+        return asset.key
 
     def _get_asset_info(self, asset: Asset) -> str:
-        if asset.type == "stock":
-            return f"Stock: {asset.ticker} ({asset.shares} shares)"
-        elif asset.type == "crypto":
-            return f"Cryptocurrency: {asset.symbol} ({asset.amount} units)"
-        elif asset.type == "real_estate":
-            return f"Real Estate: {asset.address} (${asset.market_value:,.2f})"
-        elif asset.type == "mortgage":
-            return f"Mortgage: {asset.lender} (${asset.balance:,.2f} balance)"
-        elif asset.type == "cash":
-            return f"Cash: {asset.currency} (${asset.amount:,.2f})"
-        else:
+        formatter = _ASSET_INFO_FORMATTERS.get(type(asset))
+        if formatter is None:
             return f"Asset: {asset.type}"
+        return formatter(asset)
 
     def _prepare_news_summary(self, news_items: list[NewsItem]) -> str:
         if not news_items:
@@ -275,12 +551,15 @@ class AnalysisTool:
 class PortfolioSummarizerTool:
     def __init__(self):
         self.llm = AzureChatOpenAI(
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT" or ""),
+            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT", ""),
             azure_deployment="gpt-4o-mini",
             api_key=SecretStr(os.getenv('AZURE_OPENAI_API_KEY') or ""),
             api_version="2025-01-01-preview",
-            temperature=0.2
+            temperature=0.2,
+            http_client=get_llm_sync_http_client(),
+            http_async_client=get_llm_http_client()
         )
+        self.structured_llm = self.llm.with_structured_output(PortfolioDigestResponse)
 
 
     def create_portfolio_digest(self, analysis_results: list[AnalysisResult]) -> dict:
@@ -289,24 +568,21 @@ class PortfolioSummarizerTool:
             analysis_summary = self._prepare_analysis_summary(analysis_results)
 
             messages: list[BaseMessage] = [
-                SystemMessage(content="""You are a senior portfolio manager providing a comprehensive portfolio digest.
-
-                Synthesize the individual asset analyses into the structured response format.
-                Be concise but actionable. Focus on portfolio-level insights, not individual assets."""),
+                DIGEST_SYSTEM_MESSAGE,
                 HumanMessage(content=f"""Portfolio Analysis Results:
                 {analysis_summary}
 
                 Please provide a comprehensive portfolio digest.""")
             ]
 
-            response = cast(PortfolioDigestResponse, self.llm.with_structured_output(PortfolioDigestResponse).invoke(messages))
+            response = cast(PortfolioDigestResponse, self.structured_llm.invoke(messages))
 
             all_recommendations = []
             high_risk_alerts = []
 
             for result in analysis_results:
                 all_recommendations.extend(result.recommendations)
-                if any(keyword in result.risk_assessment.lower() for keyword in ['high risk', 'significant risk', 'warning', 'concern']):
+                if HIGH_RISK_RE.search(result.risk_assessment):
                     high_risk_alerts.append(f"{result.asset_key}: {result.risk_assessment}")
 
             digest = {
@@ -1,8 +1,13 @@
 # backend/app/agent/utils.py
 
+import hashlib
 import logging
 from typing import Any
 
+import orjson
+
+from ..models import Portfolio
+
 logger = logging.getLogger(__name__)
 
 def clean_value(val: Any) -> str | int | float | bool | str:
@@ -24,3 +29,11 @@ def dump(x):
         return [dump(v) for v in x]
     return x
 
+
+def portfolio_hash(portfolio: Portfolio) -> str:
+    # Canonical JSON per asset, sorted so asset order doesn't change the key
+    assets = sorted(
+        orjson.dumps(asset.model_dump(mode="json"), option=orjson.OPT_SORT_KEYS)
+        for asset in portfolio.assets
+    )
+    return hashlib.blake2b(b"\n".join(assets), digest_size=16).hexdigest()
@@ -9,6 +9,11 @@ from langfuse.decorators import langfuse_context, observe
 
 logger = logging.getLogger(__name__)
 
+# Events are queued and sent by the SDK's background thread; larger, less frequent
+# batches keep tracing HTTP off the request path under load
+LANGFUSE_FLUSH_AT = 100
+LANGFUSE_FLUSH_INTERVAL_SECONDS = 2.0
+
 
 class LangfuseConfig:
 
@@ -29,6 +34,16 @@ class LangfuseConfig:
             self.enabled = os.getenv("LANGFUSE_ENABLED", "true").lower() == "true"
             self.initialized = True
 
+            try:
+                # Same batching and on/off switch for the @observe decorators
+                langfuse_context.configure(
+                    flush_at=LANGFUSE_FLUSH_AT,
+                    flush_interval=LANGFUSE_FLUSH_INTERVAL_SECONDS,
+                    enabled=self.enabled
+                )
+            except Exception as e:
+                logger.debug(f"Failed to configure Langfuse decorators: {e}")
+
             if self.enabled and self.secret_key and self.public_key:
                 self._initialize_langfuse()
             else:
@@ -36,23 +51,25 @@ class LangfuseConfig:
 
     def _initialize_langfuse(self):
         try:
-            self._langfuse = Langfuse(
-                secret_key=self.secret_key,
-                public_key=self.public_key,
-                host=self.host
-            )
-
-            self._handler = CallbackHandler(
-                secret_key=self.secret_key,
-                public_key=self.public_key,
-                host=self.host
-            )
+            self._langfuse = Langfuse(**self.client_kwargs())
+            self._handler = CallbackHandler(**self.client_kwargs())
 
             logger.info(f"Langfuse initialized successfully at {self.host}")
         except Exception as e:
             logger.error(f"Failed to initialize Langfuse: {e}")
             self.enabled = False
 
+    def client_kwargs(self) -> dict:
+        """Constructor arguments shared by every Langfuse client and callback handler."""
+        return {
+            "secret_key": self.secret_key,
+            "public_key": self.public_key,
+            "host": self.host,
+            "flush_at": LANGFUSE_FLUSH_AT,
+            "flush_interval": LANGFUSE_FLUSH_INTERVAL_SECONDS,
+            "enabled": self.enabled,
+        }
+
     @property
     def langfuse(self) -> Langfuse | None:
         return self._langfuse if self.enabled else None
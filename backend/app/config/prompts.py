@@ -1,6 +1,8 @@
 # backend/app/config/prompts.py
 
+import hashlib
 import logging
+import time
 from typing import Any
 
 from langchain.schema import BaseMessage, HumanMessage, SystemMessage
@@ -10,11 +12,148 @@ from .langfuse import langfuse_config
 
 logger = logging.getLogger(__name__)
 
+# Matches the Langfuse SDK's own prompt cache TTL, so prompt edits still roll out within a minute
+SYSTEM_MESSAGE_CACHE_TTL_SECONDS = 60
+
+# Module-level so every call sends the byte-identical prefix; per-turn values never go in here
+FALLBACK_PROMPTS = {
+    "chat-intent-classifier":
+        """You are a portfolio assistant helping users build their investment portfolio.
+        Classify the user's intent into one of these categories:
+
+        1. "add_asset" - User wants to add an asset (stock, crypto, real estate, etc.)
+        2. "remove_asset" - User wants to remove an asset
+        3. "modify_asset" - User wants to change quantity/details of existing asset
+        4. "list_assets" - User wants to see current portfolio
+        5. "complete_portfolio" - User indicates they're done adding assets
+        6. "ask_question" - General question about portfolio or investing
+        7. "greeting" - Initial greeting or general conversation
+        8. "unclear" - Intent is not clear
+
+        Consider the conversation history to understand context.
+        Return ONLY the intent category, nothing else.""",
+
+    "chat-entity-extractor":
+        """Extract investment details from the user message.
+        Look for:
+        - Asset type (stock, crypto, real_estate, mortgage, cash)
+        - Asset identifier (ticker, symbol, address, etc.)
+        - Quantity/amount/shares
+        - Additional details (currency, lender, etc.)
+
+        Consider the conversation context to understand references like "it", "that", "the same", etc.
+
+        Return ONLY a valid JSON object with extracted information.
+        Example outputs:
+        {"type": "stock", "ticker": "AAPL", "shares": 100}
+        {"type": "crypto", "symbol": "BTC", "amount": 0.5}
+        {"type": "real_estate", "address": "123 Main St, NYC", "value": 500000}
+        {"type": "cash", "currency": "USD", "amount": 10000}
+
+        If information is missing, include what you found and mark missing fields as null.
+        DO NOT include any text outside the JSON object.""",
+
+    "chat-turn-processor":
+        """You are a friendly portfolio assistant helping users build their investment portfolio.
+        For the user's latest message, do three things at once:
+
+        1. Classify the intent as one of: start, add_asset, remove_asset, modify_asset,
+           complete_portfolio, view_portfolio, start_over, general_question, unclear.
+        2. If the intent is add_asset, modify_asset or remove_asset, extract each asset
+           mentioned (asset type, identifier such as ticker/symbol/address/lender, and
+           quantity/amount/shares). Resolve references like "it" or "the same" from the
+           conversation. Leave unknown fields null and leave entities empty otherwise.
+        3. Write the reply to the user.
+
+        Reply guidelines:
+        - Be conversational and helpful, your goal to make the user create a complete portfolio in our database.
+        - Reference previous conversation when relevant
+        - If information is missing, ask for specific details
+        - Suggest common asset types if portfolio seems incomplete
+        - Keep responses concise but informative""",
+
+    "chat-history-summarizer":
+        """Summarize the conversation between a user and a portfolio assistant.
+        If an existing summary is given, fold the new messages into it.
+
+        Keep every fact needed to continue the conversation: assets discussed with their
+        identifiers and quantities, what was added, removed or confirmed, and open questions.
+        Drop greetings and small talk. Answer in at most 150 words of plain text.""",
+
+    "chat-intent-entity-extractor":
+        """You are a portfolio assistant helping users build their investment portfolio.
+        For the user's latest message, do two things at once:
+
+        1. Classify the intent as one of: start, add_asset, remove_asset, modify_asset,
+           complete_portfolio, view_portfolio, start_over, general_question, unclear.
+        2. If the intent is add_asset, modify_asset or remove_asset, extract each asset
+           mentioned (asset type, identifier such as ticker/symbol/address/lender, and
+           quantity/amount/shares). Resolve references like "it" or "the same" from the
+           conversation. Leave unknown fields null and leave entities empty otherwise.""",
+
+    "tools-news-classifier":
+        """You are a financial news classifier. Analyze the given news article and classify it with the following criteria:
+
+        1. SENTIMENT: positive, negative, or neutral
+        2. IMPACT: high, medium, or low (how much this could affect the asset price)
+        3. RELEVANCE: Score from 0-1 (how relevant this is to the specific asset)
+        4. RISK_TYPE: market_risk, regulatory_risk, operational_risk, credit_risk, or other
+
+        Reply **only** with a valid JSON object as described below, and nothing else:
+        {
+            "sentiment": "positive/negative/neutral",
+            "impact": "high/medium/low",
+            "relevance_score": 0.0-1.0,
+            "risk_type": "market_risk/regulatory_risk/operational_risk/credit_risk/other",
+            "reasoning": "Brief explanation of your classification"
+        }""",
+
+    "tools-news-batch-classifier":
+        """You are a financial news classifier. You will receive one asset and a numbered list of news articles about it.
+        Classify EVERY article with the following criteria:
+
+        1. SENTIMENT: positive, negative, or neutral
+        2. IMPACT: high, medium, or low (how much this could affect the asset price)
+        3. RELEVANCE: Score from 0-1 (how relevant this is to the specific asset)
+
+        Return exactly one classification per article, in the same order as the numbered list.""",
+
+    "tools-asset-analyzer":
+        """You are an expert financial advisor analyzing portfolio assets based on recent news.
+
+        Provide a comprehensive analysis including:
+        1. SENTIMENT_SUMMARY: Overall sentiment from the news (2-3 sentences)
+        2. RISK_ASSESSMENT: Current risk level and factors (2-3 sentences)
+        3. RECOMMENDATIONS: 3-5 specific actionable recommendations
+        4. CONFIDENCE_SCORE: Your confidence in this analysis (0-1)
+
+        Be specific, actionable, and focus on risk management and optimization opportunities.
+        Consider both short-term news impacts and long-term portfolio health.""",
+
+    # Versioned: the unversioned prompt hosted in Langfuse still expects {intent}/{entities}
+    "chat-response-generator-v2":
+        """You are a friendly portfolio assistant helping users build their investment portfolio.
+
+        The user's classified intent and extracted entities for this turn are given
+        in a context message just before their latest message.
+
+        Guidelines:
+        - Be conversational and helpful, your goal to make the user create a complete portfolio in our database.
+        - Reference previous conversation when relevant
+        - If information is missing, ask for specific details
+        - Confirm when assets are added/removed
+        - Suggest common asset types if portfolio seems incomplete
+        - Keep responses concise but informative
+        - Remember what the user has already told you
+
+        Generate an appropriate response based on the conversation history."""
+}
+
 
 class PromptManager:
     def __init__(self):
         self.langfuse = langfuse_config.langfuse
-        self._cache: dict[str, Any] = {}
+        self._cache: dict[str, tuple[SystemMessage, float]] = {}
 
     def get_prompt(self, prompt_name: str, variables: dict[str, Any] | None = None) -> str:
         try:
@@ -54,8 +193,17 @@ class PromptManager:
             return self._get_fallback_prompt(prompt_name, variables)
 
     def get_system_message(self, prompt_name: str, variables: dict[str, Any] | None = None) -> SystemMessage:
-        content = self.get_prompt(prompt_name, variables)
-        return SystemMessage(content=content)
+        if variables:
+            return SystemMessage(content=self.get_prompt(prompt_name, variables))
+
+        # Static prompts are fetched and wrapped once per TTL instead of on every LLM call
+        cached = self._cache.get(prompt_name)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+        system_msg = SystemMessage(content=self.get_prompt(prompt_name))
+        self._cache[prompt_name] = (system_msg, time.monotonic() + SYSTEM_MESSAGE_CACHE_TTL_SECONDS)
+        return system_msg
 
     def get_human_message(self, prompt_name: str, variables: dict[str, Any] | None = None) -> HumanMessage:
         content = self.get_prompt(prompt_name, variables)
@@ -66,7 +214,8 @@ class PromptManager:
         system_prompt_name: str,
         user_content: str,
         system_variables: dict[str, Any] | None = None,
-        conversation_history: list[BaseMessage] | None = None
+        conversation_history: list[BaseMessage] | None = None,
+        context_content: str | None = None
     ) -> list[BaseMessage]:
         """
         Build a complete message list with system prompt from Langfuse and user message.
@@ -76,6 +225,8 @@ class PromptManager:
             user_content: User message content
             system_variables: Variables for the system prompt
             conversation_history: Optional conversation history to include
+            context_content: Optional per-turn context, sent after the history so the
+                system prompt and history stay a stable, provider-cacheable prefix
 
         Returns:
             List of messages ready for LLM
@@ -84,104 +235,22 @@ class PromptManager:
 
         system_msg = self.get_system_message(system_prompt_name, system_variables)
         messages.append(system_msg)
+        if logger.isEnabledFor(logging.DEBUG):
+            prefix_hash = hashlib.blake2b(str(system_msg.content).encode(), digest_size=8).hexdigest()
+            logger.debug(f"System prompt '{system_prompt_name}' prefix hash: {prefix_hash}")
 
         if conversation_history:
             messages.extend(conversation_history)
 
+        if context_content:
+            messages.append(SystemMessage(content=context_content))
+
         messages.append(HumanMessage(user_content))
 
         return messages
 
     def _get_fallback_prompt(self, prompt_name: str, variables: dict[str, Any] | None = None) -> str:
-
-        fallback_prompts = {
-            "chat-intent-classifier":
-                """You are a portfolio assistant helping users build their investment portfolio.
-                Classify the user's intent into one of these categories:
-
-                1. "add_asset" - User wants to add an asset (stock, crypto, real estate, etc.)
-                2. "remove_asset" - User wants to remove an asset
-                3. "modify_asset" - User wants to change quantity/details of existing asset
-                4. "list_assets" - User wants to see current portfolio
-                5. "complete_portfolio" - User indicates they're done adding assets
-                6. "ask_question" - General question about portfolio or investing
-                7. "greeting" - Initial greeting or general conversation
-                8. "unclear" - Intent is not clear
-
-                Consider the conversation history to understand context.
-                Return ONLY the intent category, nothing else.""",
-
-            "chat-entity-extractor":
-                """Extract investment details from the user message.
-                Look for:
-                - Asset type (stock, crypto, real_estate, mortgage, cash)
-                - Asset identifier (ticker, symbol, address, etc.)
-                - Quantity/amount/shares
-                - Additional details (currency, lender, etc.)
-
-                Consider the conversation context to understand references like "it", "that", "the same", etc.
-
-                Return ONLY a valid JSON object with extracted information.
-                Example outputs:
-                {"type": "stock", "ticker": "AAPL", "shares": 100}
-                {"type": "crypto", "symbol": "BTC", "amount": 0.5}
-                {"type": "real_estate", "address": "123 Main St, NYC", "value": 500000}
-                {"type": "cash", "currency": "USD", "amount": 10000}
-
-                If information is missing, include what you found and mark missing fields as null.
-                DO NOT include any text outside the JSON object.""",
-
-            "tools-news-classifier":
-                """You are a financial news classifier. Analyze the given news article and classify it with the following criteria:
-
-                1. SENTIMENT: positive, negative, or neutral
-                2. IMPACT: high, medium, or low (how much this could affect the asset price)
-                3. RELEVANCE: Score from 0-1 (how relevant this is to the specific asset)
-                4. RISK_TYPE: market_risk, regulatory_risk, operational_risk, credit_risk, or other
-
-                Reply **only** with a valid JSON object as described below, and nothing else:
-                {
-                    "sentiment": "positive/negative/neutral",
-                    "impact": "high/medium/low",
-                    "relevance_score": 0.0-1.0,
-                    "risk_type": "market_risk/regulatory_risk/operational_risk/credit_risk/other",
-                    "reasoning": "Brief explanation of your classification"
-                }""",
-
-            "tools-asset-analyzer":
-                """You are an expert financial advisor analyzing portfolio assets based on recent news.
-
-                Provide a comprehensive analysis including:
-                1. SENTIMENT_SUMMARY: Overall sentiment from the news (2-3 sentences)
-                2. RISK_ASSESSMENT: Current risk level and factors (2-3 sentences)
-                3. RECOMMENDATIONS: 3-5 specific actionable recommendations
-                4. CONFIDENCE_SCORE: Your confidence in this analysis (0-1)
-
-                Be specific, actionable, and focus on risk management and optimization opportunities.
-                Consider both short-term news impacts and long-term portfolio health.""",
-
-            "chat-response-generator":
-                """You are a friendly portfolio assistant helping users build their investment portfolio.
-
-                Current portfolio state:
-                {portfolio_summary}
-
-                User intent: {intent}
-                Extracted entities: {entities}
-
-                Guidelines:
-                - Be conversational and helpful, your goal to make the user create a complete portfolio in our database.
-                - Reference previous conversation when relevant
-                - If information is missing, ask for specific details
-                - Confirm when assets are added/removed
-                - Suggest common asset types if portfolio seems incomplete
-                - Keep responses concise but informative
-                - Remember what the user has already told you
-
-                Generate an appropriate response based on the conversation history."""
-        }
-
-        prompt = fallback_prompts.get(prompt_name, f"Prompt '{prompt_name}' not found")
+        prompt = FALLBACK_PROMPTS.get(prompt_name, f"Prompt '{prompt_name}' not found")
 
         if variables:
             try:
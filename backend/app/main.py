@@ -6,6 +6,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from logs.config import setup_logging
 
+from .agents.tools import close_http_client
 from .db import models  # noqa: F401
 from .db.base import Base, engine
 from .routers import auth_router, chat_router, digest_router, portfolio_router
@@ -67,3 +68,7 @@ def startup():
     Base.metadata.create_all(bind=engine)
     logger = logging.getLogger(__name__)
     logger.info("App startup ok")
+
+@app.on_event("shutdown")
+async def shutdown():
+    await close_http_client()
@@ -28,6 +28,7 @@ from .portfolio_responses import (
 )
 from .responses import (
     AssetAnalysisResponse,
+    ChatTurnResponse,
     EntityData,
     EntityExtractionResponse,
     FormAssetData,
@@ -35,6 +36,8 @@ from .responses import (
     FormSuggestion,
     Intent,
     IntentClassificationResponse,
+    IntentEntityResponse,
+    NewsBatchClassificationResponse,
     NewsClassificationResponse,
     PortfolioDigestResponse,
     PortfolioFormData,
@@ -70,6 +73,7 @@ __all__ = [
     "NewsItem",
     # Responses
     "AssetAnalysisResponse",
+    "ChatTurnResponse",
     "EntityData",
     "EntityExtractionResponse",
     "FormAssetData",
@@ -77,6 +81,8 @@ __all__ = [
     "FormSuggestion",
     "Intent",
     "IntentClassificationResponse",
+    "IntentEntityResponse",
+    "NewsBatchClassificationResponse",
     "NewsClassificationResponse",
     "PortfolioDigestResponse",
     "PortfolioFormData",
@@ -14,13 +14,14 @@ from .responses import EntityData, Intent, ResponseGenerationResponse, UIHints
 class ChatAgentState(BaseModel):
     session: ChatSession
     user_message: str
-    current_step: str = "classify_intent"
+    current_step: str = "classify_and_extract"
     intent: Intent
     entities: list[EntityData] = Field(default_factory=list)
     response: ResponseGenerationResponse | None = None
     ui_hints: UIHints | None = None
     confirmation_request: PortfolioConfirmationRequest | None = None
     show_form: bool = False
+    stream_response: bool = False
     errors: list[str] = Field(default_factory=list)
 
 
@@ -30,22 +31,22 @@ class PortfolioAgentState(BaseModel):
     task_type: str
 
     # processing
-    current_step: str
-    assets_to_analyze: list[Asset]
-    processed_assets: Annotated[list[str], operator.add]
+    current_step: str = "initialize"
+    assets_to_analyze: list[Asset] = Field(default_factory=list)
+    processed_assets: Annotated[list[str], operator.add] = Field(default_factory=list)
 
     # news and analysis
-    raw_news: Annotated[list[NewsItem], operator.add]
-    classified_news: Annotated[list[NewsItem], operator.add]
-    analysis_results: Annotated[list[AnalysisResult], operator.add]
+    raw_news: Annotated[list[NewsItem], operator.add] = Field(default_factory=list)
+    classified_news: Annotated[list[NewsItem], operator.add] = Field(default_factory=list)
+    analysis_results: Annotated[list[AnalysisResult], operator.add] = Field(default_factory=list)
 
     vector_context: dict | None = None
 
     # output
     final_response: str | None = None
-    recommendations: Annotated[list[str], operator.add]
-    risk_alerts: Annotated[list[str], operator.add]
+    recommendations: Annotated[list[str], operator.add] = Field(default_factory=list)
+    risk_alerts: Annotated[list[str], operator.add] = Field(default_factory=list)
 
     # meta
     execution_time: float | None = None
-    errors: Annotated[list[str], operator.add]
+    errors: Annotated[list[str], operator.add] = Field(default_factory=list)
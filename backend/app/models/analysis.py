@@ -1,11 +1,13 @@
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 from .assets import Asset
 
 
 class NewsItem(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     title: str
     snippet: str
     url: str
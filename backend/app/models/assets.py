@@ -10,25 +10,45 @@ class Stock(BaseModel):
     ticker: str
     shares: float
 
+    @property
+    def key(self) -> str:
+        return f"stock:{self.ticker}"
+
 class Crypto(BaseModel):
     type: Literal["crypto"] = "crypto"
     symbol: str
     amount: float
 
+    @property
+    def key(self) -> str:
+        return f"crypto:{self.symbol}"
+
 class RealEstate(BaseModel):
     type: Literal["real_estate"] = "real_estate"
     address: str
     market_value: float
 
+    @property
+    def key(self) -> str:
+        return f"real_estate:{self.address}"
+
 class Mortgage(BaseModel):
     type: Literal["mortgage"] = "mortgage"
     lender: str
     balance: float
     property_address: str | None = None
 
+    @property
+    def key(self) -> str:
+        return f"mortgage:{self.lender}"
+
 class Cash(BaseModel):
     type: Literal["cash"] = "cash"
     currency: str = Field(default="USD")
     amount: float
 
+    @property
+    def key(self) -> str:
+        return f"cash:{self.currency}"
+
 Asset = Stock | Crypto | RealEstate | Mortgage | Cash
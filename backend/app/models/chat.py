@@ -1,7 +1,11 @@
 from datetime import datetime
 from typing import Any
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
+
+# Oldest turns are dropped past this; agents only ever read the last 10 messages
+MAX_SESSION_MESSAGES = 50
+
 
 class ChatMessage(BaseModel):
     role: str  # "user" or "assistant"
@@ -15,6 +19,11 @@ class ChatSession(BaseModel):
     user_id: str | None = None
     messages: list[ChatMessage] = []
     context: dict[str, Any] = {}
+    # Rolling summary of the first `summarized_messages` messages, sent in their place
+    history_summary: str = ""
+    summarized_messages: int = 0
+    # LangChain view of the recent history, reused across a turn's LLM calls; never serialized
+    _history_cache: tuple[tuple, Any] | None = PrivateAttr(default=None)
     created_at: datetime = datetime.now()
     last_activity: datetime = datetime.now()
 
@@ -24,4 +33,8 @@ class ChatSession(BaseModel):
             content=content,
             metadata=metadata or {}
         ))
+        overflow = len(self.messages) - MAX_SESSION_MESSAGES
+        if overflow > 0:
+            del self.messages[:overflow]
+            self.summarized_messages = max(0, self.summarized_messages - overflow)
         self.last_activity = datetime.now()
@@ -1,3 +1,5 @@
+from functools import cached_property
+
 from pydantic import BaseModel
 
 from .assets import Asset
@@ -6,6 +8,14 @@ from .assets import Asset
 class Portfolio(BaseModel):
     assets: list[Asset]
 
+    @cached_property
+    def by_type(self) -> dict[str, list[Asset]]:
+        # Grouped once per instance; portfolios are rebuilt rather than mutated in place
+        groups: dict[str, list[Asset]] = {}
+        for asset in self.assets:
+            groups.setdefault(asset.type, []).append(asset)
+        return groups
+
 class PortfolioRequest(BaseModel):
     portfolio: Portfolio
 
@@ -48,6 +48,31 @@ class EntityExtractionResponse(BaseModel):
     )
 
 
+class IntentEntityResponse(BaseModel):
+    intent: Intent = Field(description="The classified intent from user message")
+    entities: list[EntityData] = Field(
+        default_factory=list,
+        description="Assets mentioned when adding, modifying or removing; empty otherwise"
+    )
+    primary_entity: EntityData | None = Field(
+        None,
+        description="The main entity being discussed if multiple are found"
+    )
+
+
+class ChatTurnResponse(BaseModel):
+    intent: Intent = Field(description="The classified intent from user message")
+    entities: list[EntityData] = Field(
+        default_factory=list,
+        description="Assets mentioned when adding, modifying or removing; empty otherwise"
+    )
+    primary_entity: EntityData | None = Field(
+        None,
+        description="The main entity being discussed if multiple are found"
+    )
+    response: str = Field(description="The conversational reply to the user")
+
+
 class UIHints(BaseModel):
     show_portfolio_summary: bool = Field(
         default=False,
@@ -88,6 +113,12 @@ class NewsClassificationResponse(BaseModel):
     )
 
 
+class NewsBatchClassificationResponse(BaseModel):
+    classifications: list[NewsClassificationResponse] = Field(
+        description="One classification per numbered news item, in the same order"
+    )
+
+
 class AssetAnalysisResponse(BaseModel):
     sentiment_summary: str = Field(description="Summary of overall sentiment from news")
     risk_assessment: str = Field(description="Risk assessment for the asset")
@@ -1,16 +1,15 @@
-import asyncio
-import json
 import logging
 import uuid
 from collections.abc import AsyncGenerator
 from typing import Annotated
 
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from ..agents.chat_agent import ChatAgent
-from ..agents.portfolio_agent import PortfolioAgent
+from ..agents.portfolio_agent import get_portfolio_agent
 from ..agents.services import PortfolioService
 from ..auth.dependencies import get_current_user_optional
 from ..db.base import get_db
@@ -26,7 +25,6 @@ from ..models import (
 logger = logging.getLogger(__name__)
 
 chat_agent = None
-portfolio_agent = None
 
 def get_chat_agent(db: Session | None = None):
     global chat_agent
@@ -34,14 +32,14 @@ def get_chat_agent(db: Session | None = None):
         chat_agent = ChatAgent(db)
     return chat_agent
 
-def get_portfolio_agent():
-    global portfolio_agent
-    if portfolio_agent is None:
-        portfolio_agent = PortfolioAgent()
-    return portfolio_agent
-
 chat_router = APIRouter(prefix="/chat", tags=["chat"])
 
+
+def _sse(data: dict) -> bytes:
+    # Called once per streamed token, so encode with orjson straight to bytes
+    return b"data: " + orjson.dumps(data) + b"\n\n"
+
+
 @chat_router.post("/message", response_model=ChatResponse)
 async def send_message(
     request: ChatMessageRequest,
@@ -57,7 +55,7 @@ async def send_message(
 
         logger.debug(f"Processing message with session_id={session_id}, user_id={user_id}")
 
-        result = agent.process_message(
+        result = await agent.process_message(
             session_id=session_id,
             user_message=request.message,
             user_id=user_id,
@@ -122,38 +120,24 @@ async def stream_chat_response(
     session_id: str,
     user_id: str | None = None,
     db: Session | None = None
-) -> AsyncGenerator[str, None]:
+) -> AsyncGenerator[bytes, None]:
     try:
         agent = get_chat_agent(db)
 
-        result = agent.process_message(
+        index = 0
+        async for event in agent.process_message_stream(
             session_id=session_id,
             user_message=message,
-            user_id=user_id,
-            _db=db
-        )
-
-        response_text = result.get("message", "")
-
-        metadata = {k: v for k, v in result.items() if k != "message"}
-        metadata["type"] = "metadata"
-        yield f"data: {json.dumps(metadata)}\n\n"
-
-        words = response_text.split()
-        for i, word in enumerate(words):
-            delay = 0.1 if word.endswith(('.', '!', '?', ':')) else 0.05
-
-            chunk_data = {
-                'type': 'token',
-                'content': word + (' ' if i < len(words) - 1 else ''),
-                'index': i,
-                'is_final': i == len(words) - 1
-            }
-            yield f"data: {json.dumps(chunk_data)}\n\n"
-
-            await asyncio.sleep(delay)
+            user_id=user_id
+        ):
+            if event["type"] == "token":
+                event = {**event, "index": index, "is_final": False}
+                index += 1
+            yield _sse(event)
 
-        yield f"data: {json.dumps({'type': 'complete'})}\n\n"
+        # The last token is only known once the model stops, so the final flag rides on an empty frame
+        yield _sse({'type': 'token', 'content': '', 'index': index, 'is_final': True})
+        yield _sse({'type': 'complete'})
 
     except Exception as e:
         logger.error(f"Streaming failed: {e}")
@@ -161,7 +145,7 @@ async def stream_chat_response(
             'type': 'error',
             'error': str(e)
         }
-        yield f"data: {json.dumps(error_data)}\n\n"
+        yield _sse(error_data)
 
 
 @chat_router.post("/message/stream", response_class=StreamingResponse)
@@ -260,7 +244,7 @@ async def submit_portfolio(
 
         # Run analysis if requested and save was successful
         if submission.analyze_immediately and saved_count > 0:
-            analysis_result = portfolio_agent.analyze_portfolio(
+            analysis_result = await portfolio_agent.analyze_portfolio(
                 portfolio=portfolio_to_save,
                 task_type="digest"
             )
@@ -4,19 +4,11 @@ import logging
 
 from fastapi import APIRouter, BackgroundTasks, HTTPException
 
-from ..agents.portfolio_agent import PortfolioAgent
+from ..agents.portfolio_agent import get_portfolio_agent
 from ..models.portfolio import PortfolioRequest
 
 logger = logging.getLogger(__name__)
 
-portfolio_agent = None
-
-def get_portfolio_agent():
-    global portfolio_agent
-    if portfolio_agent is None:
-        portfolio_agent = PortfolioAgent()
-    return portfolio_agent
-
 digest_router = APIRouter()
 
 @digest_router.post("/digest")
@@ -25,7 +17,7 @@ async def run_digest(request: PortfolioRequest):
         logger.info(f"Received portfolio digest request with {len(request.portfolio.assets)} assets")
         agent = get_portfolio_agent()
 
-        result = agent.analyze_portfolio(
+        result = await agent.analyze_portfolio(
             portfolio=request.portfolio,
             task_type="digest"
         )
@@ -58,7 +50,7 @@ async def analyze_portfolio(request: PortfolioRequest, query: str | None = None)
     try:
         agent = get_portfolio_agent()
 
-        result = agent.analyze_portfolio(
+        result = await agent.analyze_portfolio(
             portfolio=request.portfolio,
             task_type="analyze",
             user_query=query if query is not None else ""
@@ -84,7 +76,7 @@ async def get_portfolio_alerts(request: PortfolioRequest):
     try:
         agent = get_portfolio_agent()
 
-        result = agent.get_portfolio_alerts(request.portfolio)
+        result = await agent.get_portfolio_alerts(request.portfolio)
 
         if not result["success"]:
             raise HTTPException(status_code=500, detail=f"Alert generation failed: {result.get('error', 'Unknown error')}")
@@ -105,10 +97,10 @@ async def schedule_digest(request: PortfolioRequest, background_tasks: Backgroun
     try:
         logger.info(f"Scheduling background digest for portfolio with {len(request.portfolio.assets)} assets")
 
-        def generate_background_digest():
+        async def generate_background_digest():
             logger.info("Starting background digest generation")
             agent = get_portfolio_agent()
-            result = agent.create_scheduled_digest(request.portfolio)
+            result = await agent.create_scheduled_digest(request.portfolio)
             logger.info(f"Background digest completed: {result.get('assets_analyzed', 0)} assets analyzed")
 
         background_tasks.add_task(generate_background_digest)
@@ -151,16 +151,14 @@ async def get_portfolio_snapshot(
 
         # Get portfolio data
         portfolio = service.get_portfolio(current_user.id, portfolio_name)
-        summary = service.get_portfolio_summary(current_user.id, portfolio_name)
+        summary = service.summarize_portfolio(portfolio)
 
         assets = []
-        asset_types = set()
+        asset_types: list[str] = []
 
         if portfolio:
-            for asset in portfolio.assets:
-                asset_dict = service._asset_to_summary_dict(asset)
-                assets.append(asset_dict)
-                asset_types.add(asset.type)
+            assets = [service._asset_to_summary_dict(asset) for asset in portfolio.assets]
+            asset_types = list(portfolio.by_type)
 
         snapshot = PortfolioSnapshot(
             portfolio_id=db_portfolio.id,
@@ -168,7 +166,7 @@ async def get_portfolio_snapshot(
             name=portfolio_name,
             assets=assets,
             total_assets=len(assets),
-            asset_types=list(asset_types),
+            asset_types=asset_types,
             last_updated=db_portfolio.last_updated or db_portfolio.created_at,
             metadata={
                 "summary": summary,
@@ -0,0 +1,59 @@
+# backend/test/test_chat_streaming.py
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from backend.app.agents.chat_agent import CHAT_FALLBACK_MESSAGE, ChatAgent
+from backend.app.agents.modules.response_generator import FALLBACK_RESPONSE, ResponseGenerator
+from backend.app.agents.session_storage import InMemorySessionStorage
+from backend.app.models import Intent
+
+
+@pytest.fixture
+def agent():
+    # Bypass __init__ so no LLM, Langfuse or Redis client is built
+    agent = ChatAgent.__new__(ChatAgent)
+    agent.graph = MagicMock()
+    agent.session_storage = InMemorySessionStorage()
+    agent.history_summarizer = MagicMock()
+    agent.history_summarizer.needs_summary.return_value = False
+    agent._start_trace = MagicMock(return_value=MagicMock())
+    return agent
+
+
+@pytest.mark.asyncio
+async def test_stream_failure_yields_fallback_and_persists_turn(agent):
+    agent.graph.ainvoke = AsyncMock(side_effect=RuntimeError("graph exploded"))
+
+    events = [event async for event in agent.process_message_stream("s1", "hello there")]
+
+    assert events[0]["type"] == "metadata"
+    assert events[0]["errors"] == ["graph exploded"]
+    assert events[1] == {"type": "token", "content": CHAT_FALLBACK_MESSAGE}
+
+    stored = agent.session_storage.get("s1")
+    assert [(m.role, m.content) for m in stored.messages] == [
+        ("user", "hello there"),
+        ("assistant", CHAT_FALLBACK_MESSAGE),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_empty_model_stream_falls_back():
+    async def empty_stream(*args, **kwargs):
+        return
+        yield
+
+    llm = MagicMock()
+    llm.astream = empty_stream
+    generator = ResponseGenerator(llm)
+    generator._build_messages = MagicMock(return_value=[])
+
+    chunks = [
+        chunk async for chunk in generator.astream_response(
+            session=MagicMock(), user_message="hi", intent=Intent.GENERAL_QUESTION, entities=[]
+        )
+    ]
+
+    assert chunks == [FALLBACK_RESPONSE]
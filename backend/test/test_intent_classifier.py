@@ -0,0 +1,120 @@
+# backend/test/test_intent_classifier.py
+
+import threading
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from langchain.schema import SystemMessage
+
+from backend.app.agents.modules import intent_classifier
+from backend.app.agents.modules.intent_classifier import IntentClassifier
+from backend.app.models import ChatSession, Intent, IntentClassificationResponse
+
+
+@pytest.fixture
+def classifier(monkeypatch):
+    monkeypatch.setattr(
+        intent_classifier.prompt_manager,
+        "get_system_message",
+        lambda *args, **kwargs: SystemMessage(content="Classify the intent.")
+    )
+    classifier = IntentClassifier(MagicMock())
+    classifier.structured_llm = MagicMock()
+    classifier.structured_llm.ainvoke = AsyncMock(
+        return_value=IntentClassificationResponse(intent=Intent.GENERAL_QUESTION)
+    )
+    return classifier
+
+
+def _session(*turns: tuple[str, str]) -> ChatSession:
+    session = ChatSession(session_id="test", messages=[])
+    for role, content in turns:
+        session.add_message(role, content)
+    return session
+
+
+@pytest.mark.parametrize("message, expected_intent", [
+    ("hello!", Intent.START),
+    ("I'm done", Intent.COMPLETE_PORTFOLIO),
+    ("That's all.", Intent.COMPLETE_PORTFOLIO),
+    ("what's in my portfolio?", Intent.VIEW_PORTFOLIO),
+    ("show my holdings", Intent.VIEW_PORTFOLIO),
+    ("add 100 shares of AAPL", Intent.ADD_ASSET),
+    ("buy 10 AAPL", Intent.ADD_ASSET),
+    ("I have 100 AAPL shares", Intent.ADD_ASSET),
+    ("I own 0.5 btc", Intent.ADD_ASSET),
+    ("bought 2.5 ETH!", Intent.ADD_ASSET),
+    ("remove AAPL", Intent.REMOVE_ASSET),
+    ("Remove TSLA from my portfolio", Intent.REMOVE_ASSET),
+    ("delete my 10 shares of MSFT", Intent.REMOVE_ASSET),
+    ("drop all of my BTC", Intent.REMOVE_ASSET),
+])
+def test_fast_intent_resolves_unambiguous_messages(classifier, message, expected_intent):
+    assert classifier.fast_intent(message) == expected_intent
+
+
+@pytest.mark.parametrize("message", [
+    "I have 2 questions about my portfolio",
+    "I own 3 big houses",
+    "I have 100 shares of AAPL, should I sell?",
+    "buy 10 AAPL or 5 MSFT, which is better?",
+    "add AAPL",
+    "show me how to diversify my portfolio",
+    "delete my account",
+    "drop me a summary of my risk",
+    "remove the last message",
+    "remove Tesla from my portfolio",
+    "hello, can you explain ETFs?",
+])
+def test_fast_intent_leaves_ambiguous_messages_to_the_model(classifier, message):
+    assert classifier.fast_intent(message) is None
+
+
+@pytest.mark.asyncio
+async def test_intent_cache_hits_across_older_history(classifier):
+    first = _session(("user", "I have 10 AAPL"), ("assistant", "Anything else?"))
+    second = _session(
+        ("user", "hi"), ("assistant", "Hello!"),
+        ("user", "I own 1 BTC"), ("assistant", "Anything else?")
+    )
+
+    assert await classifier.aclassify_intent(first, "What about bonds") == Intent.GENERAL_QUESTION
+    assert await classifier.aclassify_intent(second, "what about  BONDS") == Intent.GENERAL_QUESTION
+    assert classifier.structured_llm.ainvoke.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_intent_cache_misses_when_last_reply_differs(classifier):
+    await classifier.aclassify_intent(_session(("assistant", "Should I remove AAPL?")), "yes")
+    await classifier.aclassify_intent(_session(("assistant", "Should I add AAPL?")), "yes")
+    assert classifier.structured_llm.ainvoke.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_unclear_intent_is_not_cached(classifier):
+    classifier.structured_llm.ainvoke.return_value = IntentClassificationResponse(intent=Intent.UNCLEAR)
+    session = _session(("assistant", "Anything else?"))
+
+    await classifier.aclassify_intent(session, "hmm")
+    await classifier.aclassify_intent(session, "hmm")
+    assert classifier.structured_llm.ainvoke.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_shared_intent_cache_is_read_off_the_event_loop(classifier):
+    lookup_threads = []
+
+    def shared_get(key):
+        lookup_threads.append(threading.get_ident())
+        return Intent.ADD_ASSET.value
+
+    classifier.shared_cache = MagicMock()
+    classifier.shared_cache.get.side_effect = shared_get
+
+    assert await classifier.aclassify_intent(_session(), "what about bonds") == Intent.ADD_ASSET
+    assert lookup_threads and lookup_threads[0] != threading.get_ident()
+    classifier.structured_llm.ainvoke.assert_not_awaited()
+
+    # Promoted to the in-process tier, so the second lookup skips Redis
+    await classifier.aclassify_intent(_session(), "what about bonds")
+    assert classifier.shared_cache.get.call_count == 1
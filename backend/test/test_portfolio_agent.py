@@ -39,7 +39,7 @@ async def test_agent():
 
         # Test portfolio analysis
         logger.info("📈 Running portfolio analysis...")
-        result = agent.analyze_portfolio(test_portfolio, task_type="analyze")
+        result = await agent.analyze_portfolio(test_portfolio, task_type="analyze")
 
         if result["success"]:
             logger.info("✅ Analysis completed successfully!")
@@ -0,0 +1,108 @@
+# backend/test/test_portfolio_workflow.py
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from backend.app.agents.portfolio_agent import MIN_CACHED_NEWS_PER_ASSET, PortfolioAgent
+from backend.app.models import AnalysisResult, NewsItem, PortfolioAgentState
+from backend.app.models.assets import Stock
+from backend.app.models.portfolio import Portfolio
+
+AAPL = Stock(ticker="AAPL", shares=10)
+MSFT = Stock(ticker="MSFT", shares=5)
+
+
+@pytest.fixture
+def agent():
+    # Vector store, news, classification and LLM tools are all mocked; only the graph is real
+    with patch.multiple(
+        "backend.app.agents.portfolio_agent",
+        VectorStore=MagicMock(),
+        NewsSearchTool=MagicMock(),
+        ClassificationTool=MagicMock(),
+        AnalysisTool=MagicMock(),
+        PortfolioSummarizerTool=MagicMock(),
+        CallbackHandler=MagicMock(),
+        langfuse=MagicMock(),
+    ):
+        yield PortfolioAgent()
+
+
+def _hit(url: str, asset_key: str) -> dict:
+    return {"document": f"article at {url}", "metadata": {"url": url, "asset_key": asset_key}}
+
+
+def _state(**fields) -> PortfolioAgentState:
+    fields.setdefault("assets_to_analyze", [AAPL, MSFT])
+    return PortfolioAgentState(
+        portfolio=Portfolio(assets=[AAPL, MSFT]), user_query="", task_type="analyze", **fields
+    )
+
+
+@pytest.mark.asyncio
+async def test_vector_hits_are_credited_to_every_asset_before_dedup(agent):
+    agent.vector_store.search_many.return_value = [
+        [_hit("u1", "stock:AAPL"), _hit("u2", "stock:AAPL")],
+        [_hit("u1", "stock:MSFT")],
+    ]
+
+    result = await agent._search_vector_db_wrapped([AAPL, MSFT])
+
+    assert result["asset_hits"] == {"stock:AAPL": 2, "stock:MSFT": 1}
+    assert result["found_items"] == 2
+
+
+def test_only_assets_below_the_cached_threshold_need_a_search(agent):
+    state = _state(vector_context={"asset_hits": {"stock:AAPL": MIN_CACHED_NEWS_PER_ASSET}})
+
+    assert agent._assets_needing_search(state) == [MSFT]
+    assert agent._route_after_vector_db(state) == "search_news"
+
+
+def test_fan_out_sends_each_asset_its_own_news(agent):
+    fresh = NewsItem(title="iPhone sales", snippet="s", url="u1", asset_related="stock:AAPL")
+    state = _state(
+        classified_news=[fresh],
+        vector_context={
+            "asset_hits": {"stock:AAPL": 2, "stock:MSFT": 2},
+            # u1 was also fetched fresh, so only the MSFT hit is added from the cache
+            "results": [_hit("u1", "stock:AAPL"), _hit("u2", "stock:MSFT")],
+        }
+    )
+
+    sends = agent._route_after_vector_db(state)
+
+    assert [send.node for send in sends] == ["analyze_asset", "analyze_asset"]
+    news_by_asset = {send.arg["asset"].key: [n.url for n in send.arg["news"]] for send in sends}
+    assert news_by_asset == {"stock:AAPL": ["u1"], "stock:MSFT": ["u2"]}
+
+
+def test_fan_out_goes_straight_to_the_digest_without_assets(agent):
+    assert agent._fan_out_analysis(_state(assets_to_analyze=[])) == "create_digest"
+
+
+@pytest.mark.asyncio
+async def test_digest_retry_resumes_after_the_last_completed_node(agent):
+    agent._search_vector_db_wrapped = AsyncMock(
+        return_value={"found_items": 3, "results": [], "asset_hits": {"stock:AAPL": 3}}
+    )
+    agent._analyze_asset_wrapped = AsyncMock(return_value=AnalysisResult(
+        asset_key="stock:AAPL", asset=AAPL, news_items=[], sentiment_summary="Positive",
+        risk_assessment="Low", recommendations=["Hold"], confidence_score=0.8
+    ))
+    agent._create_digest_wrapped = MagicMock(side_effect=[
+        RuntimeError("digest LLM timed out"),
+        {"final_response": "Digest", "recommendations": ["Hold"], "risk_alerts": []},
+    ])
+    agent._store_results_wrapped = MagicMock()
+
+    result = await agent.create_scheduled_digest(Portfolio(assets=[AAPL]))
+
+    assert result["success"] is True
+    assert result["response"] == "Digest"
+    assert agent._create_digest_wrapped.call_count == 2
+    # Nodes that completed before the failure were restored from the checkpoint, not rerun
+    assert agent._search_vector_db_wrapped.await_count == 1
+    assert agent._analyze_asset_wrapped.await_count == 1
+    assert agent._failed_threads == {}
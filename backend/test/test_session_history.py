@@ -0,0 +1,118 @@
+# backend/test/test_session_history.py
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import fakeredis
+import pytest
+from langchain.schema import SystemMessage
+
+from backend.app.agents.chat_agent import ChatAgent
+from backend.app.agents.modules import HistorySummarizer, conversation_history, history_summarizer
+from backend.app.agents.session_storage import RedisSessionStorage
+from backend.app.models import ChatSession, ResponseGenerationResponse
+from backend.app.models.chat import MAX_SESSION_MESSAGES
+
+
+def _session(count: int, session_id: str = "s1") -> ChatSession:
+    session = ChatSession(session_id=session_id, messages=[])
+    for i in range(count):
+        session.add_message("user" if i % 2 == 0 else "assistant", f"m{i}")
+    return session
+
+
+@pytest.fixture
+def fake_redis():
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+@pytest.fixture
+def storage(fake_redis):
+    with patch("backend.app.agents.session_storage.redis.from_url", return_value=fake_redis):
+        yield RedisSessionStorage(redis_url="redis://test")
+
+
+@pytest.fixture
+def agent(storage, monkeypatch):
+    monkeypatch.setattr(
+        history_summarizer.prompt_manager,
+        "get_system_message",
+        lambda *args, **kwargs: SystemMessage(content="Summarize.")
+    )
+    summary_llm = MagicMock()
+    summary_llm.ainvoke = AsyncMock(return_value=MagicMock(content="Rolling summary"))
+
+    # Bypass __init__ so no chat LLM or Langfuse client is built; the graph just answers "ok"
+    agent = ChatAgent.__new__(ChatAgent)
+    agent.session_storage = storage
+    agent.history_summarizer = HistorySummarizer(summary_llm)
+    agent._start_trace = MagicMock(return_value=MagicMock())
+    agent.graph = MagicMock()
+    agent.graph.ainvoke = AsyncMock(
+        side_effect=lambda state: state.model_copy(update={"response": ResponseGenerationResponse(response="ok")})
+    )
+    return agent
+
+
+def test_trimming_shifts_the_summarized_count():
+    session = _session(MAX_SESSION_MESSAGES)
+    session.history_summary, session.summarized_messages = "Earlier turns", 40
+
+    session.add_message("user", "new")
+    session.add_message("assistant", "reply")
+
+    assert len(session.messages) == MAX_SESSION_MESSAGES
+    assert session.summarized_messages == 38
+    # The first unsummarized message is still the one the summary stopped at
+    assert session.messages[session.summarized_messages].content == "m40"
+
+
+def test_history_window_starts_after_the_summary():
+    session = _session(12)
+    session.history_summary, session.summarized_messages = "Earlier turns", 8
+
+    history = conversation_history(session, limit=10)
+
+    assert history[0].content == "Prior conversation summary: Earlier turns"
+    assert [m.content for m in history[1:]] == ["m8", "m9", "m10", "m11"]
+
+
+@pytest.mark.asyncio
+async def test_summarize_trim_and_reload_keep_history_aligned(agent, storage):
+    storage.set("s1", _session(MAX_SESSION_MESSAGES - 1))
+
+    await agent.process_message("s1", "new")
+
+    reloaded = storage.get("s1")
+    expected = [f"m{i}" for i in range(1, MAX_SESSION_MESSAGES - 1)] + ["new", "ok"]
+    assert [m.content for m in reloaded.messages] == expected
+    assert reloaded.history_summary == "Rolling summary"
+    # Covered the first 46 of 50 messages, then one was trimmed off the front
+    assert reloaded.summarized_messages == MAX_SESSION_MESSAGES - 5
+    assert [m.content for m in reloaded.messages[reloaded.summarized_messages:]] == [
+        "m46", "m47", "m48", "new", "ok"
+    ]
+
+    await agent.process_message("s1", "again")
+
+    reloaded = storage.get("s1")
+    assert len(reloaded.messages) == MAX_SESSION_MESSAGES
+    assert [m.content for m in reloaded.messages[-2:]] == ["again", "ok"]
+    # No new summary this turn; two more trims still leave the count on the same message
+    assert reloaded.summarized_messages == MAX_SESSION_MESSAGES - 7
+    assert reloaded.messages[reloaded.summarized_messages].content == "m46"
+
+
+def test_legacy_session_is_migrated_on_get(storage, fake_redis):
+    legacy = _session(6)
+    fake_redis.set(f"{storage.key_prefix}s1", legacy.model_dump_json())
+
+    loaded = storage.get("s1")
+
+    assert [m.content for m in loaded.messages] == [f"m{i}" for i in range(6)]
+    assert fake_redis.llen(f"{storage.messages_key_prefix}s1") == 6
+
+    loaded.add_message("user", "new")
+    loaded.add_message("assistant", "ok")
+    storage.append_messages("s1", loaded, loaded.messages[-2:])
+
+    assert [m.content for m in storage.get("s1").messages] == [f"m{i}" for i in range(6)] + ["new", "ok"]
@@ -0,0 +1,113 @@
+# backend/test/test_tools.py
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langchain.schema import SystemMessage
+
+from backend.app.agents import tools
+from backend.app.agents.tools import AnalysisTool, ClassificationTool
+from backend.app.models import (
+    AssetAnalysisResponse,
+    NewsBatchClassificationResponse,
+    NewsClassificationResponse,
+    NewsItem,
+)
+from backend.app.models.assets import Stock
+
+
+def _news(title: str) -> NewsItem:
+    return NewsItem(title=title, snippet=f"{title} snippet", url=f"https://news.example/{title}")
+
+
+def _batch_response(messages) -> NewsBatchClassificationResponse:
+    count = str(messages[-1].content).count("News Title:")
+    return NewsBatchClassificationResponse(classifications=[
+        NewsClassificationResponse(sentiment="positive", impact="high", relevance_score=0.9)
+        for _ in range(count)
+    ])
+
+
+@pytest.fixture
+def classification_tool(monkeypatch):
+    monkeypatch.setattr(
+        tools.prompt_manager,
+        "get_system_message",
+        lambda *args, **kwargs: SystemMessage(content="Classify the news.")
+    )
+    with patch("backend.app.agents.tools.AzureChatOpenAI"):
+        tool = ClassificationTool(cache=MagicMock())
+    tool.cache.get.return_value = None
+    structured = MagicMock()
+    structured.ainvoke = AsyncMock(side_effect=_batch_response)
+    tool.llm = MagicMock()
+    tool.llm.with_structured_output.return_value = structured
+    return tool
+
+
+@pytest.mark.asyncio
+async def test_batch_classification_caches_each_item_under_its_own_asset(classification_tool):
+    apple, microsoft = Stock(ticker="AAPL", shares=10), Stock(ticker="MSFT", shares=5)
+    items = [(_news("a1"), apple), (_news("m1"), microsoft), (_news("a2"), apple)]
+
+    results = await classification_tool.aclassify_batch(items)
+
+    assert [r.title for r in results] == ["a1", "m1", "a2"]
+    assert all(r.sentiment == "positive" and r.relevance_score == 0.9 for r in results)
+    # One LLM call per asset, never a prompt that mixes the two
+    assert classification_tool.llm.with_structured_output.return_value.ainvoke.await_count == 2
+    stored = sorted((c.args[0], c.args[1].split("\n")[0]) for c in classification_tool.cache.put.call_args_list)
+    assert stored == [("stock:AAPL", "a1"), ("stock:AAPL", "a2"), ("stock:MSFT", "m1")]
+
+
+@pytest.mark.asyncio
+async def test_batch_classification_serves_cached_items_without_llm(classification_tool):
+    classification_tool.cache.get.return_value = {"sentiment": "negative", "impact": "low", "relevance_score": 0.2}
+
+    results = await classification_tool.aclassify_batch([(_news("a1"), Stock(ticker="AAPL", shares=1))])
+
+    assert results[0].sentiment == "negative"
+    classification_tool.cache.get.assert_called_once_with("stock:AAPL", "a1\na1 snippet")
+    classification_tool.llm.with_structured_output.return_value.ainvoke.assert_not_awaited()
+
+
+@pytest.fixture
+def analysis_tool(monkeypatch):
+    monkeypatch.setattr(tools.prompt_manager, "build_messages", lambda *args, **kwargs: [])
+    with patch("backend.app.agents.tools.AzureChatOpenAI"):
+        tool = AnalysisTool(cache=MagicMock())
+    tool.cache.get.return_value = None
+    structured = MagicMock()
+    structured.ainvoke = AsyncMock(return_value=AssetAnalysisResponse(
+        sentiment_summary="Positive", risk_assessment="Low", recommendations=["Hold"], confidence_score=0.8
+    ))
+    tool.llm = MagicMock()
+    tool.llm.with_structured_output.return_value = structured
+    return tool
+
+
+@pytest.mark.asyncio
+async def test_analysis_is_cached_under_the_asset_key(analysis_tool):
+    news = [_news("b"), _news("a")]
+
+    result = await analysis_tool.aanalyze_asset(Stock(ticker="AAPL", shares=10), news)
+
+    assert result.asset_key == "stock:AAPL" and result.confidence_score == 0.8
+    # Headline order does not change the cache text
+    analysis_tool.cache.get.assert_called_once_with("stock:AAPL", "a|b")
+    analysis_tool.cache.put.assert_called_once()
+    assert analysis_tool.cache.put.call_args.args[:2] == ("stock:AAPL", "a|b")
+    assert analysis_tool.cache.put.call_args.args[2]["confidence_score"] == 0.8
+
+
+@pytest.mark.asyncio
+async def test_cached_analysis_skips_llm(analysis_tool):
+    analysis_tool.cache.get.return_value = {
+        "sentiment_summary": "Negative", "risk_assessment": "High", "recommendations": [], "confidence_score": 0.3
+    }
+
+    result = await analysis_tool.aanalyze_asset(Stock(ticker="MSFT", shares=1), [_news("m1")])
+
+    assert result.sentiment_summary == "Negative"
+    analysis_tool.llm.with_structured_output.return_value.ainvoke.assert_not_awaited()
+    analysis_tool.cache.put.assert_not_called()
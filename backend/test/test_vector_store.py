@@ -0,0 +1,64 @@
+# backend/test/test_vector_store.py
+
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+import pytest
+from qdrant_client.models import FieldCondition, MatchValue
+
+from backend.app.agents.services.vector_store import QueryResultCache, SemanticCache
+
+
+@pytest.fixture
+def cache():
+    # Qdrant and the embedding model are both mocked; only the filtering logic is real
+    return SemanticCache(
+        client=MagicMock(),
+        embed_query=MagicMock(return_value=[0.1, 0.2, 0.3]),
+        collection_name="llm_analysis_cache",
+        ttl=timedelta(days=7)
+    )
+
+
+def test_semantic_cache_lookup_is_filtered_to_the_asset(cache):
+    cache.client.search.return_value = [MagicMock(score=0.97, payload={"value": {"sentiment": "positive"}})]
+
+    assert cache.get("stock:AAPL", "Apple beats earnings") == {"sentiment": "positive"}
+
+    query_filter = cache.client.search.call_args.kwargs["query_filter"]
+    assert FieldCondition(key="asset_key", match=MatchValue(value="stock:AAPL")) in query_filter.must
+    assert cache.client.search.call_args.kwargs["score_threshold"] == 0.92
+
+
+def test_semantic_cache_miss_and_errors_return_none(cache):
+    cache.client.search.return_value = []
+    assert cache.get("stock:AAPL", "Apple beats earnings") is None
+
+    cache.client.search.side_effect = ConnectionError("qdrant down")
+    assert cache.get("stock:AAPL", "Apple beats earnings") is None
+
+
+def test_semantic_cache_put_stores_the_asset_key(cache):
+    cache.put("crypto:BTC", "Bitcoin rallies", {"sentiment": "positive"})
+
+    point = cache.client.upsert.call_args.kwargs["points"][0]
+    assert point.payload["asset_key"] == "crypto:BTC"
+    assert point.payload["value"] == {"sentiment": "positive"}
+    assert point.vector == [0.1, 0.2, 0.3]
+
+
+def test_query_result_cache_matches_near_duplicates_within_a_scope():
+    cache = QueryResultCache(threshold=0.85)
+    scope = (("stock:AAPL",), 7, 10)
+    cache.put(scope, [1.0, 0.0], [{"document": "hit"}])
+
+    assert cache.get(scope, [0.99, 0.05]) == [{"document": "hit"}]
+    assert cache.get(scope, [0.0, 1.0]) is None
+    assert cache.get((("stock:MSFT",), 7, 10), [1.0, 0.0]) is None
+
+
+def test_query_result_cache_expires_entries():
+    cache = QueryResultCache(ttl_seconds=0)
+    cache.put(("scope",), [1.0, 0.0], [{"document": "hit"}])
+
+    assert cache.get(("scope",), [1.0, 0.0]) is None